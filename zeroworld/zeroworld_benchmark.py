@@ -0,0 +1,232 @@
+"""
+제로월드 예약 벤치마크
+로컬 대체 서버(zeroworld_standin)에 대해 조회 루프 처리량과 슬롯 발견→예약 지연 시간을 측정하고 기준값과 비교
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+import logging
+
+from zeroworld_reservation import (
+    STORE_CONFIGS, AvailabilityPoller, BookingExecutor, MetricsRegistry, ReservationWatcher, ThemeCatalog, WatchJob,
+    ZeroWorldReservation, setup_logging
+)
+from zeroworld_standin import StandInServer
+
+# 벤치마크용 지점 이름 (STORE_CONFIGS에 실행 중에만 등록)
+BENCHMARK_STORE = 'standin'
+
+# 벤치마크 예약자 정보
+BENCHMARK_USER = {'name': '벤치마크', 'phone': '010-0000-0000', 'people_count': 2}
+
+# 기준값 대비 허용 악화 비율 (0.2 = 20%)
+DEFAULT_TOLERANCE = 0.2
+
+# 값이 클수록 좋은 지표 (나머지는 작을수록 좋음)
+HIGHER_IS_BETTER = ('requests_per_second',)
+
+
+def percentile(values, ratio):
+    """정렬 후 ratio 위치의 값 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def summarize(values):
+    """지연 시간 목록 요약 (초)"""
+    return {
+        'count': len(values),
+        'p50': percentile(values, 0.5),
+        'p95': percentile(values, 0.95),
+        'max': max(values) if values else None,
+    }
+
+
+def register_store(server):
+    """대체 서버를 벤치마크 지점으로 등록 (요청 속도 제한 없음)"""
+    STORE_CONFIGS[BENCHMARK_STORE] = {
+        'name': '로컬 대체 서버',
+        'base_url': server.base_url,
+        'booking_path': server.state.scenario['booking_path'],
+        'max_qps': 0,
+    }
+
+
+def bench_polling(dates, duration, workers):
+    """조회 루프 처리량: 여러 날짜를 동시에 반복 조회해 초당 요청 수와 주기별 소요 시간 측정"""
+    server = StandInServer().start()
+    register_store(server)
+    reservation = ZeroWorldReservation(store=BENCHMARK_STORE, theme_catalog=ThemeCatalog())
+    poller = AvailabilityPoller(max_workers=workers)
+    try:
+        cycle_times = []
+        requests_sent = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            cycle_start = time.perf_counter()
+            poller.poll(reservation, dates, BENCHMARK_USER)
+            cycle_times.append(time.perf_counter() - cycle_start)
+            requests_sent += len(dates)
+        elapsed = time.perf_counter() - start
+        
+        return {
+            'requests_per_second': requests_sent / elapsed,
+            'cycle_seconds': summarize(cycle_times),
+            'server_requests': dict(server.state.request_counts),
+        }
+    finally:
+        poller.shutdown()
+        reservation.cleanup()
+        server.stop()
+
+
+def bench_booking(booking_mode, rounds, check_interval, open_delay, headless=True):
+    """슬롯 발견→예약 지연 시간: 정해진 시각에 슬롯을 열고 감시 루프가 예약을 마칠 때까지 측정"""
+    target_date = datetime.now() + timedelta(days=7)
+    date_str = target_date.strftime('%Y-%m-%d')
+    server = StandInServer({'page_month': date_str[:7]}).start()
+    register_store(server)
+    theme = server.state.scenario['themes'][0]
+    theme_id = str(theme['PK'])
+    slot_times = server.state.scenario['times']
+    
+    metrics = MetricsRegistry()
+    job = WatchJob(BENCHMARK_STORE, theme['title'].split('] ', 1)[-1], [target_date],
+                   {'start': '00:00', 'end': '23:59'})
+    watcher = ReservationWatcher(
+        [job],
+        BENCHMARK_USER,
+        reservation_options={'booking_mode': booking_mode, 'headless': headless, 'max_qps': 0},
+        theme_catalog=ThemeCatalog(),
+        # 회차마다 새 예약을 잡으므로 보유 예약 수 상한을 회차 수로 설정
+        booking_executor=BookingExecutor(max_bookings=rounds),
+        metrics=metrics
+    )
+    
+    open_to_booked = []
+    try:
+        watcher.run_cycle()  # 초기 상태 반영 (열린 슬롯 없음)
+        if booking_mode == 'selenium':
+            # 브라우저 기동 시간은 측정에서 제외
+            next(iter(watcher.reservations.values())).setup_driver(headless)
+        
+        for round_index in range(rounds):
+            time_str = slot_times[round_index % len(slot_times)]
+            server.state.schedule('open', date_str, theme_id, time_str, delay=open_delay)
+            booked_count = len(server.state.bookings)
+            
+            deadline = time.time() + open_delay + 30
+            while len(server.state.bookings) == booked_count and time.time() < deadline:
+                result = watcher.run_cycle()
+                if result:
+                    break
+                time.sleep(check_interval)
+            
+            if len(server.state.bookings) == booked_count:
+                logging.getLogger(__name__).warning(f"{round_index + 1}회차 예약 실패: {date_str} {time_str}")
+                continue
+            
+            booking = server.state.bookings[-1]
+            open_to_booked.append(booking['received_at'] - booking['opened_at'])
+        
+        # 조회에서 슬롯을 발견한 시각부터 예약 전송까지 (감시 루프 내부 처리 시간)
+        stats = metrics.snapshot().get('slot_open_to_submit')
+        detected_to_submit = stats['sum'] / stats['calls'] if stats and stats['calls'] else None
+        
+        return {
+            'open_to_booked_seconds': summarize(open_to_booked),
+            'detected_to_submit_avg_seconds': detected_to_submit,
+            'booked': len(open_to_booked),
+            'rounds': rounds,
+            'server_requests': dict(server.state.request_counts),
+        }
+    finally:
+        watcher.cleanup()
+        server.stop()
+
+
+def flatten(results, prefix=''):
+    """중첩된 결과를 {'polling.requests_per_second': 값} 형태로 변환"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """기준값보다 tolerance 이상 나빠진 지표 목록"""
+    regressions = []
+    current = flatten(results)
+    for name, base in flatten(baseline).items():
+        value = current.get(name)
+        if value is None or not base or name.endswith('.count') or 'server_requests' in name:
+            continue
+        if name.rsplit('.', 1)[-1] in HIGHER_IS_BETTER:
+            worse = value < base * (1 - tolerance)
+        else:
+            worse = value > base * (1 + tolerance)
+        if worse:
+            regressions.append(f"{name}: {base:.4f} -> {value:.4f}")
+    return regressions
+
+
+def main():
+    """벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="로컬 대체 서버 기반 예약 벤치마크")
+    parser.add_argument('--suites', default='polling,http', help="실행할 항목 (polling, http, selenium)")
+    parser.add_argument('--duration', type=float, default=5, help="조회 처리량 측정 시간 (초)")
+    parser.add_argument('--dates', type=int, default=7, help="동시에 조회할 날짜 수")
+    parser.add_argument('--workers', type=int, default=4, help="조회 스레드 수")
+    parser.add_argument('--rounds', type=int, default=5, help="예약 측정 반복 횟수")
+    parser.add_argument('--check-interval', type=float, default=0.2, help="예약 측정 시 조회 간격 (초)")
+    parser.add_argument('--open-delay', type=float, default=0.5, help="슬롯을 여는 시점 (초 뒤)")
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일")
+    parser.add_argument('--baseline', help="비교할 기준 결과 JSON 파일 (악화 시 종료 코드 1)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+    
+    setup_logging('WARNING')
+    suites = [suite.strip() for suite in args.suites.split(',') if suite.strip()]
+    start_date = datetime.now() + timedelta(days=1)
+    
+    results = {}
+    if 'polling' in suites:
+        dates = [start_date + timedelta(days=offset) for offset in range(args.dates)]
+        results['polling'] = bench_polling(dates, args.duration, args.workers)
+    for booking_mode in ('http', 'selenium'):
+        if booking_mode in suites:
+            try:
+                results[booking_mode] = bench_booking(booking_mode, args.rounds, args.check_interval,
+                                                      args.open_delay)
+            except Exception as e:
+                # Selenium 항목은 Chrome이 없는 환경에서 건너뜀
+                print(f"⚠️  {booking_mode} 예약 측정 실패: {e}")
+    
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ 기준값 대비 성능 저하:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("✅ 기준값 대비 성능 저하 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+제로월드 예약 데몬
+config.py 변경을 감지해 재시작 없이 감시 작업을 추가/삭제하고, 로컬 HTTP 제어 인터페이스로 작업 목록/일시 정지/상태를 제공
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+import logging
+
+from zeroworld_reservation import (
+    DEFAULT_LOGGING, STORE_CONFIGS, PollScheduler, SlotScorer, create_predictor, create_watcher, load_watch_jobs,
+    setup_logging
+)
+
+# 제어 인터페이스 기본값 (localhost에서만 접근)
+DEFAULT_CONTROL = {
+    'host': '127.0.0.1',
+    'port': 8790,
+}
+
+# 설정 파일 변경 확인 주기 (초)
+CONFIG_CHECK_INTERVAL = 2
+
+
+class ConfigSource:
+    """설정 파일(config.py)을 경로로 읽고 수정 시각으로 변경 여부 확인"""
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.mtime = None
+        self.loaded_at = None
+    
+    def changed(self):
+        try:
+            return os.path.getmtime(self.path) != self.mtime
+        except OSError:
+            return False
+    
+    def load(self):
+        """설정 모듈을 새로 읽어 (RESERVATION_CONFIG, STORE_CONFIGS) 반환"""
+        # 실패해도 같은 파일을 반복해서 읽지 않도록 먼저 기록
+        self.mtime = os.path.getmtime(self.path)
+        spec = importlib.util.spec_from_file_location('zeroworld_daemon_config', self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.loaded_at = time.time()
+        return module.RESERVATION_CONFIG, getattr(module, 'STORE_CONFIGS', {})
+
+
+class ReservationDaemon:
+    """감시기를 계속 실행하면서 설정 변경과 제어 명령을 반영 (지점별 세션, 토큰, 브라우저, 테마 매핑 유지)
+    
+    감시기는 감시 스레드에서만 다루고, 제어 명령과 설정 재적용은 데몬 상태만 바꾼 뒤 다음 주기 시작 전에 반영
+    """
+    def __init__(self, config_path):
+        self.logger = logging.getLogger(__name__)
+        self.config_source = ConfigSource(config_path)
+        config, stores = self.config_source.load()
+        STORE_CONFIGS.update(stores)
+        
+        self.config = config
+        self.apply_logging(config)
+        self.all_jobs = load_watch_jobs(config)
+        self.watcher = create_watcher(config, self.all_jobs)
+        # 취소 패턴 예측기는 학습 상태를 유지하도록 예측 설정이 바뀔 때만 새로 생성
+        self.predictor = create_predictor(config)
+        self.scheduler = PollScheduler(config['check_interval'], config.get('schedule'), self.predictor)
+        self.scorer = self.watcher.scorer
+        self.user_info = config['user_info']
+        
+        # 예약에 성공한 작업 {name: 결과} - 설정에서 빠지거나 재개하기 전까지 감시하지 않음
+        self.completed = {}
+        # 일시 정지한 작업 이름
+        self.paused = set()
+        # 데몬 상태(작업 목록, 설정, 상태 요약) 잠금 - 감시 주기 동안에는 잡지 않음
+        self.lock = threading.RLock()
+        # 감시기에 반영할 변경이 있음 (대기 중이면 바로 깨어나 반영)
+        self.changed = threading.Event()
+        self.stop_event = threading.Event()
+        
+        self.started_at = time.time()
+        self.cycles = 0
+        self.last_cycle_at = None
+        self.last_error = None
+        # 마지막 주기 기준 감시기 요약 (제어 스레드에서 감시기를 직접 읽지 않음)
+        self.watch_summary = self.summarize_watcher()
+    
+    def reload(self):
+        """설정 파일을 다시 읽어 작업 목록, 예약자 정보, 조회 주기, 점수 가중치 반영 (실패 시 기존 설정 유지)"""
+        try:
+            config, stores = self.config_source.load()
+            # 새로 읽은 지점까지 포함해 확인 (STORE_CONFIGS에는 검증이 끝난 뒤에만 반영)
+            jobs = load_watch_jobs(config, {**STORE_CONFIGS, **stores})
+            user_info = config['user_info']
+            scorer = SlotScorer(config.get('scoring'))
+            predictor = self.predictor
+            if config.get('prediction') != self.config.get('prediction'):
+                predictor = create_predictor(config)
+            scheduler = PollScheduler(config['check_interval'], config.get('schedule'), predictor)
+            if config.get('logging') != self.config.get('logging'):
+                self.apply_logging(config)
+        except Exception as e:
+            with self.lock:
+                self.last_error = f"설정 재적용 실패: {e}"
+            self.logger.error(self.last_error)
+            return False
+        
+        # 모든 구성 요소를 만든 뒤에만 교체
+        STORE_CONFIGS.update(stores)
+        with self.lock:
+            self.config = config
+            self.all_jobs = jobs
+            names = {job.name for job in jobs}
+            self.completed = {name: result for name, result in self.completed.items() if name in names}
+            self.paused &= names
+            self.predictor = predictor
+            self.scheduler = scheduler
+            self.scorer = scorer
+            self.user_info = user_info
+            watching = len([job for job in self.watching_jobs() if job.name not in self.paused])
+        self.changed.set()
+        
+        self.logger.info(f"설정 재적용: {len(jobs)}개 작업 ({watching}개 감시 중)")
+        return True
+    
+    def apply_logging(self, config):
+        """설정의 로그 수준/파일로 로그 출력 스레드 (재)시작"""
+        logging_config = dict(DEFAULT_LOGGING)
+        logging_config.update(config.get('logging', {}))
+        setup_logging(**logging_config)
+    
+    def watching_jobs(self):
+        return [job for job in self.all_jobs if job.name not in self.completed]
+    
+    def pause(self, name):
+        """작업 일시 정지 (감시 중인 작업이 아니면 False)"""
+        with self.lock:
+            if name in self.paused or name not in {job.name for job in self.watching_jobs()}:
+                return False
+            self.paused.add(name)
+        self.changed.set()
+        return True
+    
+    def resume(self, name):
+        """일시 정지 해제 (예약 완료된 작업은 다시 감시)"""
+        with self.lock:
+            if name in self.completed:
+                del self.completed[name]
+            elif name in self.paused:
+                self.paused.discard(name)
+            else:
+                return False
+        self.changed.set()
+        return True
+    
+    def apply_changes(self):
+        """제어 명령/설정 재적용으로 바뀐 상태를 감시기에 반영 (감시 스레드에서만 호출)"""
+        if not self.changed.is_set():
+            return
+        self.changed.clear()
+        with self.lock:
+            jobs = self.watching_jobs()
+            paused = set(self.paused)
+            self.watcher.user_info = self.user_info
+            self.watcher.scorer = self.scorer
+        self.watcher.paused = paused
+        self.watcher.update_jobs(jobs)
+        with self.lock:
+            self.watch_summary = self.summarize_watcher()
+    
+    def complete(self, result):
+        """예약에 성공한 작업을 감시 대상에서 제외 (감시 스레드에서 호출)"""
+        job = result['job']
+        with self.lock:
+            self.completed[job.name] = {
+                'date': result['date'].strftime('%Y-%m-%d'),
+                'time': result['time'],
+                'message': result['message'],
+                'booked_at': time.time(),
+            }
+        # 다른 작업이 새 예약을 잡을 수 있도록 보유 예약 수 초기화
+        self.watcher.booking_executor.reset()
+        self.changed.set()
+        self.apply_changes()
+        print(f"✅ 작업 완료: {job.name} ({result['date'].strftime('%Y-%m-%d')} {result['time']})")
+    
+    def job_status(self):
+        """작업별 상태 목록"""
+        with self.lock:
+            jobs = []
+            for job in self.all_jobs:
+                if job.name in self.completed:
+                    state = 'booked'
+                elif job.name in self.paused:
+                    state = 'paused'
+                else:
+                    state = 'watching'
+                jobs.append({
+                    'name': job.name,
+                    'store': job.store,
+                    'theme': job.theme,
+                    'dates': [target_date.strftime('%Y-%m-%d') for target_date in job.target_dates],
+                    'time_range': job.time_windows.describe(),
+                    'priority': job.priority,
+                    'state': state,
+                    'booking': self.completed.get(job.name),
+                })
+            return jobs
+    
+    def summarize_watcher(self):
+        """감시기 상태 요약 (감시 스레드에서 호출)"""
+        return {
+            'stores': [reservation.store_name for reservation in self.watcher.reservations.values()],
+            'targets': len(self.watcher.targets),
+        }
+    
+    def status(self):
+        """데몬 상태 요약"""
+        jobs = self.job_status()
+        with self.lock:
+            return {
+                'started_at': self.started_at,
+                'config_path': self.config_source.path,
+                'config_loaded_at': self.config_source.loaded_at,
+                'cycles': self.cycles,
+                'last_cycle_at': self.last_cycle_at,
+                'last_error': self.last_error,
+                'stores': self.watch_summary['stores'],
+                'targets': self.watch_summary['targets'],
+                'jobs': {state: sum(1 for job in jobs if job['state'] == state)
+                         for state in ('watching', 'paused', 'booked')},
+                'metrics': self.watcher.metrics.snapshot(),
+                'events': self.watcher.metrics.counter_snapshot(),
+                # 취소 가능성에 따른 날짜별 조회 간격 배수 (예측을 쓰지 않으면 빈 값)
+                'poll_factors': {f"{base_url} {date_str}": round(factor, 2)
+                                 for (base_url, date_str), factor in self.scheduler.factors.items()},
+            }
+    
+    def run(self):
+        """정지 요청이 있을 때까지 감시 주기 반복 (감시기는 이 스레드에서만 사용)"""
+        hot_standby = self.config.get('hot_standby', False)
+        if self.config.get('booking_mode') == 'selenium':
+            self.watcher.warm_drivers()
+        if hot_standby:
+            self.watcher.prepare_standby()
+        
+        retried = False
+        while not self.stop_event.is_set():
+            with self.lock:
+                scheduler = self.scheduler
+            try:
+                self.apply_changes()
+                keys = None if retried else scheduler.due_targets(self.watcher.target_keys())
+                result = self.watcher.run_cycle(keys)
+                if result:
+                    self.complete(result)
+                scheduler.record_cycle(self.watcher.last_snapshots,
+                                       self.watcher.target_themes() if scheduler.predictor else None)
+                with self.lock:
+                    self.cycles += 1
+                    self.last_cycle_at = time.time()
+                    self.watch_summary = self.summarize_watcher()
+                # 예약이 확인되지 않은 슬롯은 한 번만 바로 다시 조회
+                retry_now = self.watcher.retry_now and not retried
+                retried = retry_now
+                delay = 0 if retry_now else scheduler.next_delay()
+                if hot_standby and not result:
+                    self.watcher.ensure_standby()
+                self.watcher.metrics.maybe_export()
+            except Exception as e:
+                with self.lock:
+                    self.last_error = f"감시 주기 오류: {e}"
+                self.logger.error(self.last_error)
+                delay = scheduler.base_interval
+            
+            self.sleep(delay)
+    
+    def sleep(self, delay):
+        """delay초 대기 (대기 중 설정 파일이 바뀌거나 제어 명령이 오면 바로 반영하고 다음 주기 시작)"""
+        deadline = time.monotonic() + delay
+        while not self.stop_event.is_set() and not self.changed.is_set():
+            if self.config_source.changed():
+                self.reload()
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self.changed.wait(min(remaining, CONFIG_CHECK_INTERVAL))
+    
+    def stop(self):
+        self.stop_event.set()
+        self.changed.set()
+    
+    def cleanup(self):
+        self.watcher.cleanup()
+
+
+class ControlHandler(BaseHTTPRequestHandler):
+    """제어 인터페이스
+    
+    GET  /status               데몬 상태와 지표
+    GET  /jobs                 작업 목록과 상태
+    POST /jobs/<name>/pause    작업 일시 정지
+    POST /jobs/<name>/resume   작업 재개 (예약 완료된 작업은 다시 감시)
+    POST /reload               설정 파일 다시 읽기
+    POST /stop                 데몬 종료
+    """
+    daemon = None
+    
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip('/')
+        if path == '/status':
+            self.send_json(200, self.daemon.status())
+        elif path == '/jobs':
+            self.send_json(200, self.daemon.job_status())
+        else:
+            self.send_json(404, {'message': 'Not Found'})
+    
+    def do_POST(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if parts == ['reload']:
+            ok = self.daemon.reload()
+            self.send_json(200 if ok else 400, {'success': ok, 'message': self.daemon.last_error if not ok else ''})
+        elif parts == ['stop']:
+            self.daemon.stop()
+            self.send_json(200, {'success': True})
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] in ('pause', 'resume'):
+            name = unquote(parts[1])
+            action = self.daemon.pause if parts[2] == 'pause' else self.daemon.resume
+            if action(name):
+                self.send_json(200, {'success': True, 'job': name})
+            else:
+                self.send_json(404, {'success': False, 'message': f"작업을 찾을 수 없거나 상태를 바꿀 수 없습니다: {name}"})
+        else:
+            self.send_json(404, {'message': 'Not Found'})
+    
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+def start_control_server(daemon, host, port):
+    """제어 인터페이스를 백그라운드 스레드에서 실행"""
+    handler = type('BoundControlHandler', (ControlHandler,), {'daemon': daemon})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name='control', daemon=True).start()
+    return httpd
+
+
+def main():
+    """데몬 실행"""
+    parser = argparse.ArgumentParser(description="제로월드 예약 데몬 (설정 자동 재적용, 로컬 제어 인터페이스)")
+    parser.add_argument('--config', default='config.py', help="감시할 설정 파일")
+    args = parser.parse_args()
+    
+    daemon = ReservationDaemon(args.config)
+    control = dict(DEFAULT_CONTROL)
+    control.update(daemon.config.get('control', {}))
+    httpd = start_control_server(daemon, control['host'], control['port'])
+    print(f"📡 예약 데몬 실행 중: {len(daemon.all_jobs)}개 작업, 제어 http://{control['host']}:{control['port']}")
+    
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("사용자에 의해 중단되었습니다.")
+    finally:
+        httpd.shutdown()
+        daemon.cleanup()
+
+
+if __name__ == "__main__":
+    main()
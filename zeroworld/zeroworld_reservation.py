@@ -1,39 +1,1457 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import atexit
+import json
+import os
+import queue
+import random
+import re
 import requests
+from array import array
+from bisect import bisect_left
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException, NoAlertPresentException
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from config import RESERVATION_CONFIG, STORE_CONFIGS
 
+# 날짜 동시 조회 기본 상한
+DEFAULT_MAX_CONCURRENCY = 4
+
+# 한 주기에 동시에 시도할 상위 후보 슬롯 수
+DEFAULT_PARALLEL_BOOKINGS = 3
+
+# 동시에 보유(진행 중 포함)할 수 있는 예약 수 상한 - 1이면 한 번에 하나씩만 전송
+DEFAULT_MAX_BOOKINGS = 1
+
+# 지점별 조회 요청 속도 상한 (초당 요청 수)
+DEFAULT_MAX_QPS = 5
+
+# 조회 주기 스케줄 기본값 (초)
+DEFAULT_SCHEDULE = {
+    'release_times': [],      # 새 날짜가 열리는 시각 목록 (예: ['00:00'])
+    'burst_window': 120,      # 릴리스 시각 전후 고빈도 조회 구간
+    'burst_interval': 1,      # 고빈도 조회 주기
+    'max_interval': 300,      # 백오프 최대 주기
+    'backoff_factor': 2,      # 오류/한산한 시간 백오프 배수
+    'jitter': 0.2,            # 주기 무작위 변동 비율
+    'quiet_hours': None,      # 한산한 시간대 (예: {'start': '02:00', 'end': '08:00'})
+}
+
+# HTTP 전송 설정 기본값
+DEFAULT_TRANSPORT = {
+    'pool_connections': 4,    # 호스트별 연결 풀 개수
+    'pool_maxsize': 10,       # 연결 풀 크기 (동시 조회 수 이상 권장)
+    'retries': 2,             # 연결 실패 재시도 횟수 (POST는 연결 단계에서만 재시도)
+    'backoff_factor': 0.2,    # 재시도 간격 배수
+    'connect_timeout': 3.05,  # 연결 제한 시간 (초)
+    'read_timeout': 10,       # 응답 제한 시간 (초)
+}
+
+# 예약 페이지 AJAX 요청 공통 헤더 (CSRF 토큰, referer 제외)
+AJAX_HEADERS = {
+    'accept': 'application/json, text/javascript, */*; q=0.01',
+    'accept-language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
+    'content-type': 'application/x-www-form-urlencoded; charset=UTF-8',
+    'sec-ch-ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"macOS"',
+    'sec-fetch-dest': 'empty',
+    'sec-fetch-mode': 'cors',
+    'sec-fetch-site': 'same-origin',
+    'x-requested-with': 'XMLHttpRequest',
+    'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+
+# 테마 매핑 캐시 기본값
+DEFAULT_THEME_CACHE = {
+    'path': 'theme_cache.json',   # 디스크 저장 경로 (None이면 메모리에만 보관)
+    'ttl': 6 * 3600,              # 날짜별 매핑 유효 시간 (초)
+    'max_entries': 500,           # (지점, 날짜) 항목 최대 개수 (오래 사용하지 않은 항목부터 제거)
+}
+
+# 종료 시 테마 캐시 기록을 기다리는 시간 (초)
+THEME_CACHE_CLOSE_TIMEOUT = 5
+
+# 후보 슬롯 점수 가중치 (점수가 낮을수록 우선)
+# 기본값은 작업 우선순위 > 시간 구간 선호 순위 > 날짜 순서 > 이른 시간 순으로 비교
+DEFAULT_SCORING = {
+    'theme': 100000,   # 작업(테마) 우선순위 1단계당
+    'window': 1000,    # 시간 구간 선호 순위 1단계당
+    'date': 10,        # target_dates 순서 1단계당
+    'time': 1,         # 하루 중 시각 (0~1, 이른 시간 우선)
+}
+
+# 시간 구간 요일 지정 별칭 (월=0 ... 일=6)
+WEEKDAY_ALIASES = {
+    'all': range(7),
+    'weekday': range(5),
+    'weekend': (5, 6),
+}
+
+# 예약 방식: 'http'는 예약 폼을 직접 전송하고 거부되면 Selenium으로 재시도
+BOOKING_MODES = ('http', 'selenium')
+
+# Selenium 단계별 대기 시간 상한 (초)
+SELENIUM_STEP_TIMEOUTS = {
+    'page_load': 15,      # 예약 페이지 로드 + datepicker 렌더링
+    'date_select': 5,     # 날짜 클릭 후 테마 목록 표시
+    'theme_select': 5,    # 테마 라디오 체크 + 시간 목록 표시
+    'time_select': 3,     # 시간 라디오 체크
+    'next_step': 5,       # nextBtn 클릭 후 사용자 정보 입력 화면
+    'policy': 2,          # 정책 동의 체크
+    'submit': 5,          # 예약 버튼 클릭 후 alert 또는 결과 페이지
+}
+
+# 예약 전송 후 /reservation/theme 재조회로 슬롯이 마감되었는지 확인
+BOOKING_VERIFY = {
+    'attempts': 3,        # 재조회 횟수 (서버 반영 지연 대비)
+    'interval': 0.3,      # 재조회 간격 (초)
+}
+
+# 예약 실패 분류
+BOOKING_FAILURES = (
+    'slot_taken',         # 다른 사람이 먼저 예약해 슬롯이 마감됨
+    'token_expired',      # 세션/CSRF 토큰 만료로 거부됨
+    'validation',         # 입력값 검증 실패 등으로 거부됨
+    'network',            # 요청이 서버에 전달되지 않았거나 처리되지 않은 것이 확인됨
+    'unknown',            # 전송 후 결과를 알 수 없음 (슬롯 재조회로 판정)
+)
+
+# 예약 결과 문구 분류 (alert, 응답 메시지/페이지) - 마감 문구를 먼저 확인 ('이미 예약이 완료된 시간' 등)
+SLOT_TAKEN_PHRASES = ('이미 예약', '예약된 시간', '마감되었', '마감된', '예약이 불가', '예약할 수 없')
+BOOKING_SUCCESS_PHRASES = ('예약이 완료', '예약 완료', '예약되었습니다')
+
+# 서버가 예약을 처리하지 않은 것이 확실해 같은 슬롯을 바로 다시 시도해도 되는 실패
+RETRYABLE_FAILURES = ('token_expired', 'network')
+
+# 예약 재시도 설정
+BOOKING_RETRY = {
+    'attempts': 2,          # 토큰 만료/전송 실패 시 같은 슬롯 재시도 횟수
+    'precheck_age': 1.0,    # 슬롯을 발견한 조회가 이보다 오래됐으면(초) 전송 직전에 다시 확인
+}
+
+# 지연 시간 히스토그램 구간 상한 (초)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 지표 내보내기 기본값
+DEFAULT_METRICS = {
+    'path': None,              # 출력 파일 (None이면 수집만 함)
+    'format': 'prometheus',    # 'prometheus' (텍스트 파일을 매번 교체) 또는 'jsonl' (내보낼 때마다 한 줄 추가)
+    'interval': 60,            # 내보내기 주기 (초)
+}
+METRICS_FORMATS = ('prometheus', 'jsonl')
+
+# 로그 출력 기본값 (출력은 백그라운드 스레드에서 처리)
+DEFAULT_LOGGING = {
+    'level': 'INFO',     # 'DEBUG'로 설정하면 조회마다 예약 가능 시간 목록 출력
+    'path': None,        # 로그 파일 (None이면 콘솔에만 출력)
+    'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+}
+
+# 예약 현황 기록 기본값 (취소 패턴 분석용)
+DEFAULT_HISTORY = {
+    'path': None,          # JSON lines 파일 (None이면 기록하지 않음)
+    'queue_size': 10000,   # 기록 대기열 크기 (가득 차면 버리고 개수만 집계)
+    'heartbeat': 600,      # 변경이 없어도 이 주기(초)마다 한 번 기록 (기록 공백 = 감시 중단 구분용)
+}
+
+# 취소 패턴 예측 기본값 (날짜별 조회 간격을 다시 나눔)
+DEFAULT_PREDICTION = {
+    'enabled': False,
+    'prior_rate': 0.05,    # 기록이 없을 때 가정하는 테마별 시간당 취소 수
+    'prior_hours': 12,     # 사전 가정의 가중치 (관찰 시간으로 환산)
+    'min_factor': 0.5,     # 조회 간격 배수 하한 (가능성이 높은 날짜는 최대 2배 자주 조회)
+    'max_factor': 4,       # 조회 간격 배수 상한 (가능성이 낮은 날짜도 기본 간격의 4배 안에 조회)
+    'max_gap': None,       # 이보다 긴 조회 공백은 관찰 시간으로 치지 않음 (초, None이면 조회 주기 설정으로 계산)
+}
+
+# 계산한 max_gap에 더하는 여유 (조회 자체에 걸리는 시간, 초)
+PREDICTION_GAP_MARGIN = 60
+
+# Selenium 드라이버 풀 기본값
+DEFAULT_DRIVER_POOL = {
+    'size': 1,               # 미리 띄워 둘 예비 드라이버 수
+    'max_uses': 20,          # 사용 횟수가 넘으면 교체
+    'max_memory_mb': 500,    # 페이지 JS 힙 사용량(MB)이 넘으면 교체
+    'max_age': 3600,         # 실행 시간(초)이 넘으면 교체
+    'health_timeout': 3,     # 응답 확인 제한 시간 (초)
+}
+
+# 대기(hot standby) 예약 화면 재준비 주기 (초) - 세션/토큰 만료 대비
+STANDBY_MAX_AGE = 1800
+# 대기 예약 화면 준비 실패 시 재시도 간격 (초) - 실패할 때마다 두 배, 최대값까지
+STANDBY_RETRY_DELAY = 30
+STANDBY_RETRY_MAX_DELAY = 600
+
+# CSRF 토큰/세션 쿠키 수명 관리 (초)
+SESSION_MAX_AGE = 3600        # 쿠키 만료 정보가 없을 때 토큰 재발급 주기
+SESSION_REFRESH_MARGIN = 120  # 만료 전 미리 갱신하는 여유 시간
+
+# 토큰 만료 판단에 쓰는 쿠키 (Laravel 세션/XSRF 쿠키, 분석용 쿠키 등은 무시)
+SESSION_COOKIE_NAMES = ('XSRF-TOKEN',)
+SESSION_COOKIE_SUFFIX = '_session'
+
+# 세션(토큰) 만료로 판단하는 응답 코드
+SESSION_EXPIRED_STATUSES = (401, 403, 419)
+
+# CSRF 토큰 획득 방식: 'http'는 페이지 HTML에서 직접 추출하고 실패 시 브라우저 사용
+BOOTSTRAP_MODES = ('http', 'selenium')
+
+# 예약 페이지 HTML에서 CSRF 토큰을 찾는 패턴 (우선순위 순)
+CSRF_HTML_PATTERNS = [
+    re.compile(r'<meta\s[^>]*name=["\'](?:csrf-token|_token)["\'][^>]*content=["\']([^"\']+)', re.I),
+    re.compile(r'<meta\s[^>]*content=["\']([^"\']+)["\'][^>]*name=["\'](?:csrf-token|_token)["\']', re.I),
+    re.compile(r'<input\s[^>]*name=["\']_token["\'][^>]*value=["\']([^"\']+)', re.I),
+    re.compile(r'<input\s[^>]*value=["\']([^"\']+)["\'][^>]*name=["\']_token["\']', re.I),
+    re.compile(r'csrfToken["\']?\s*:\s*["\']([^"\']+)'),
+]
+
+
+def parse_minutes(time_str):
+    """'HH:MM' 또는 'HH:MM:SS'(한 자리 시도 허용)를 자정 기준 분으로 변환 (strptime 없이, 범위를 벗어나면 ValueError)"""
+    parts = time_str.split(':')
+    if len(parts) not in (2, 3):
+        raise ValueError(f"잘못된 시각 형식: {time_str!r}")
+    hours, minutes = int(parts[0]), int(parts[1])
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"잘못된 시각: {time_str!r}")
+    return hours * 60 + minutes
+
+
+def parse_days(days):
+    """시간 구간 요일 지정('weekday', 'weekend', 'all' 또는 요일 번호 목록)을 요일 집합으로 변환 (알 수 없으면 ValueError)"""
+    if isinstance(days, str):
+        if days not in WEEKDAY_ALIASES:
+            raise ValueError(f"알 수 없는 요일 지정: {days!r} (가능: {', '.join(WEEKDAY_ALIASES)} 또는 0~6 목록)")
+        return set(WEEKDAY_ALIASES[days])
+    if isinstance(days, int):
+        days = [days]
+    weekdays = set(days)
+    if not all(isinstance(day, int) and 0 <= day <= 6 for day in weekdays):
+        raise ValueError(f"알 수 없는 요일 지정: {days!r} (요일 번호는 월=0 ... 일=6)")
+    return weekdays
+
+
+def classify_booking_message(text):
+    """예약 결과 문구 분류 ('slot_taken', 'success', 알 수 없으면 None)"""
+    text = str(text or '')
+    if any(phrase in text for phrase in SLOT_TAKEN_PHRASES):
+        return 'slot_taken'
+    if any(phrase in text for phrase in BOOKING_SUCCESS_PHRASES):
+        return 'success'
+    return None
+
+
+def format_minutes(minutes):
+    """자정 기준 분을 'HH:MM'으로 변환"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class TimeWindows:
+    """여러 시간 구간을 분 단위 마스크로 미리 변환 (슬롯마다 상수 시간 판정)"""
+    def __init__(self, time_ranges):
+        if isinstance(time_ranges, dict):
+            time_ranges = [time_ranges]
+        
+        self.ranges = [(parse_minutes(r['start']), parse_minutes(r['end'])) for r in time_ranges]
+        # mask[m]이 1이면 m분이 어느 한 구간에 포함 (종료 시각 포함, 자정을 넘는 구간 지원)
+        self.mask = bytearray(24 * 60)
+        for start, end in self.ranges:
+            if start <= end:
+                self.mask[start:end + 1] = b'\x01' * (end - start + 1)
+            else:
+                self.mask[start:] = b'\x01' * (24 * 60 - start)
+                self.mask[:end + 1] = b'\x01' * (end + 1)
+    
+    def contains(self, minutes):
+        return bool(self.mask[minutes])
+    
+    def filter(self, minutes_list):
+        """구간 내 시간만 오름차순으로 반환"""
+        mask = self.mask
+        return sorted(m for m in minutes_list if mask[m])
+    
+    def describe(self):
+        return ", ".join(f"{format_minutes(start)}-{format_minutes(end)}" for start, end in self.ranges)
+    
+    # 로그 인자로 넘기면 출력 스레드에서 문자열로 변환
+    __str__ = describe
+
+
+class AvailabilitySnapshot:
+    """날짜별 예약 현황 스냅샷 (/reservation/theme 응답 1회 파싱 결과)"""
+    def __init__(self, date_str, theme_mapping, theme_minutes):
+        self.date_str = date_str
+        # {theme_name: theme_id}
+        self.theme_mapping = theme_mapping
+        # {theme_id: array('H', [자정 기준 분, ...])} 예약 가능한 시간만 오름차순으로 저장
+        self.theme_minutes = theme_minutes
+        self.fetched_at = time.time()
+    
+    def get_minutes(self, theme_id=None):
+        """테마별 예약 가능한 시간(분) 반환 (theme_id가 없으면 전체 테마)"""
+        if theme_id is not None:
+            return self.theme_minutes.get(str(theme_id), array('H'))
+        
+        all_minutes = array('H')
+        for minutes in self.theme_minutes.values():
+            all_minutes.extend(minutes)
+        return all_minutes
+    
+    def get_times(self, theme_id=None):
+        """테마별 예약 가능한 시간('HH:MM') 반환 (theme_id가 없으면 전체 테마)"""
+        return [format_minutes(m) for m in self.get_minutes(theme_id)]
+
+
+class ThemeCatalog:
+    """지점/날짜별 테마 매핑 캐시 (디스크 저장은 백그라운드 스레드, TTL 만료, LRU 제한, ID→테마명 역색인)"""
+    def __init__(self, path=None, ttl=DEFAULT_THEME_CACHE['ttl'], max_entries=DEFAULT_THEME_CACHE['max_entries']):
+        # 상대 경로는 실행 위치가 아닌 스크립트 폴더 기준
+        if path and not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # {(store, date_str): {'mapping': {name: id}, 'reverse': {id: name}, 'updated_at': ts}}
+        self.entries = OrderedDict()
+        # 날짜 정보가 없을 때 사용하는 지점 단위 역색인 {(store, theme_id): name}
+        self.store_reverse = {}
+        self.lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+        self.load()
+        
+        # 디스크 기록 요청 (조회 스레드는 파일 쓰기를 기다리지 않음)
+        self.saved_at = time.time()
+        self.dirty = False
+        self.closed = False
+        self.save_event = threading.Event()
+        self.thread = None
+        if self.path:
+            self.thread = threading.Thread(target=self.save_loop, name='theme-cache', daemon=True)
+            self.thread.start()
+    
+    def get(self, store, date_str):
+        """유효한 테마 매핑 반환 (없거나 만료되면 None)"""
+        with self.lock:
+            entry = self.entries.get((store, date_str))
+            if entry is None:
+                return None
+            if time.time() - entry['updated_at'] > self.ttl:
+                del self.entries[(store, date_str)]
+                return None
+            self.entries.move_to_end((store, date_str))
+            return entry['mapping']
+    
+    def put(self, store, date_str, mapping):
+        """조회한 테마 매핑 저장 (매핑이 바뀌었거나 마지막 기록이 오래된 경우에만 디스크 기록 요청)"""
+        with self.lock:
+            key = (store, date_str)
+            entry = self.entries.get(key)
+            now = time.time()
+            changed = entry is None or entry['mapping'] != mapping or now - self.saved_at > self.ttl / 2
+            
+            if entry is not None and entry['mapping'] == mapping:
+                entry['updated_at'] = now
+            else:
+                entry = {
+                    'mapping': dict(mapping),
+                    'reverse': {str(theme_id): name for name, theme_id in mapping.items()},
+                    'updated_at': now
+                }
+                self.entries[key] = entry
+                for theme_id, name in entry['reverse'].items():
+                    self.store_reverse[(store, theme_id)] = name
+            self.entries.move_to_end(key)
+            
+            if len(self.entries) > self.max_entries:
+                self.evict()
+            
+            if changed and self.path:
+                self.dirty = True
+                self.save_event.set()
+    
+    def get_theme_name(self, store, theme_id, date_str=None):
+        """테마 ID로 테마명 찾기 (해당 날짜 우선, 없으면 지점 전체)"""
+        with self.lock:
+            if date_str is not None:
+                entry = self.entries.get((store, date_str))
+                if entry is not None:
+                    name = entry['reverse'].get(str(theme_id))
+                    if name:
+                        return name
+            return self.store_reverse.get((store, str(theme_id)))
+    
+    def theme_names(self, store):
+        """지점의 유효한 모든 테마명"""
+        with self.lock:
+            now = time.time()
+            names = set()
+            for (entry_store, _), entry in self.entries.items():
+                if entry_store == store and now - entry['updated_at'] <= self.ttl:
+                    names.update(entry['mapping'].keys())
+            return names
+    
+    def has_store(self, store):
+        return bool(self.theme_names(store))
+    
+    def evict(self):
+        """max_entries를 넘는 오래 사용하지 않은 항목 제거 (지점 역색인도 남은 항목으로 다시 구성)"""
+        with self.lock:
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.store_reverse = {}
+            for (store, _), entry in self.entries.items():
+                for theme_id, name in entry['reverse'].items():
+                    self.store_reverse[(store, theme_id)] = name
+    
+    def load(self):
+        """디스크에 저장된 캐시 로드 (만료된 항목은 제외)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            for item in sorted(data.get('entries', []), key=lambda item: item['updated_at']):
+                if now - item['updated_at'] > self.ttl:
+                    continue
+                mapping = item['mapping']
+                self.entries[(item['store'], item['date'])] = {
+                    'mapping': mapping,
+                    'reverse': {str(theme_id): name for name, theme_id in mapping.items()},
+                    'updated_at': item['updated_at']
+                }
+                for name, theme_id in mapping.items():
+                    self.store_reverse[(item['store'], str(theme_id))] = name
+            if len(self.entries) > self.max_entries:
+                self.evict()
+            self.logger.info(f"테마 캐시 로드: {len(self.entries)}개 항목 ({self.path})")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"테마 캐시 로드 실패: {e}")
+    
+    def save_loop(self):
+        """기록 요청이 있을 때마다 디스크에 기록 (close() 후 남은 변경을 기록하고 종료)"""
+        while True:
+            self.save_event.wait()
+            self.save_event.clear()
+            if self.dirty:
+                self.save()
+            if self.closed:
+                break
+    
+    def save(self):
+        """캐시를 디스크에 기록 (잠금은 스냅샷을 만들 때만, 임시 파일에 쓴 뒤 교체)"""
+        if not self.path:
+            return
+        with self.lock:
+            self.dirty = False
+            self.saved_at = time.time()
+            data = {'entries': [
+                {'store': store, 'date': date_str, 'mapping': entry['mapping'], 'updated_at': entry['updated_at']}
+                for (store, date_str), entry in self.entries.items()
+            ]}
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"테마 캐시 저장 실패: {e}")
+    
+    def close(self):
+        """기록 스레드 종료 (남은 변경은 기록)"""
+        if self.thread is None or self.closed:
+            return
+        self.closed = True
+        self.save_event.set()
+        self.thread.join(THEME_CACHE_CLOSE_TIMEOUT)
+
+
+class SlotEvent:
+    """예약 슬롯 변화 이벤트 ('opened' 또는 'closed')"""
+    def __init__(self, kind, store, date_str, theme_id, minutes, detected_at=None):
+        self.kind = kind
+        self.store = store  # 지점 base_url
+        self.date_str = date_str
+        self.theme_id = theme_id
+        self.minutes = minutes
+        self.detected_at = detected_at  # 변화를 발견한 조회 시각
+    
+    @property
+    def time_str(self):
+        return format_minutes(self.minutes)
+    
+    @property
+    def key(self):
+        return (self.store, self.date_str, self.theme_id, self.minutes)
+    
+    def __repr__(self):
+        return f"SlotEvent({self.kind}, {self.date_str}, {self.theme_id}, {self.time_str})"
+
+
+class SlotTracker:
+    """(지점, 날짜, 테마 ID, 시간) 단위로 이전 조회와 비교해 열림/닫힘 이벤트만 생성"""
+    def __init__(self):
+        # {(store, date_str): snapshot.theme_minutes} - 변경 여부를 빠르게 비교하기 위한 원본
+        self.previous_minutes = {}
+        # {(store, date_str): {theme_id: set(minutes)}}
+        self.open_slots = {}
+    
+    def update(self, store, snapshot):
+        """스냅샷 하나를 반영하고 변경된 슬롯 이벤트 목록 반환 (변경이 없으면 빈 목록)"""
+        if snapshot is None:
+            return []
+        
+        key = (store, snapshot.date_str)
+        if self.previous_minutes.get(key) == snapshot.theme_minutes:
+            return []
+        self.previous_minutes[key] = snapshot.theme_minutes
+        
+        previous = self.open_slots.get(key, {})
+        current = {theme_id: set(minutes) for theme_id, minutes in snapshot.theme_minutes.items()}
+        self.open_slots[key] = current
+        
+        events = []
+        for theme_id in current.keys() | previous.keys():
+            now_open = current.get(theme_id, set())
+            was_open = previous.get(theme_id, set())
+            for minutes in sorted(now_open - was_open):
+                events.append(SlotEvent('opened', store, snapshot.date_str, theme_id, minutes, snapshot.fetched_at))
+            for minutes in sorted(was_open - now_open):
+                events.append(SlotEvent('closed', store, snapshot.date_str, theme_id, minutes, snapshot.fetched_at))
+        return events
+    
+    def update_all(self, snapshots):
+        """{(store, date_str): snapshot} 전체 반영"""
+        events = []
+        for (store, _), snapshot in snapshots.items():
+            events.extend(self.update(store, snapshot))
+        return events
+    
+    def retain(self, keys):
+        """조회 대상에서 빠진 (store, date_str)의 상태 제거"""
+        for key in list(self.open_slots.keys() | self.previous_minutes.keys()):
+            if key not in keys:
+                self.open_slots.pop(key, None)
+                self.previous_minutes.pop(key, None)
+    
+    def forget(self, store, date_str, theme_id, time_str):
+        """예약에 실패한 슬롯은 다음 조회에서도 열려 있으면 다시 'opened'로 보고"""
+        key = (store, date_str)
+        self.open_slots.get(key, {}).get(str(theme_id), set()).discard(parse_minutes(time_str))
+        self.previous_minutes.pop(key, None)
+
+
+class StepTimer:
+    """단계별 소요 시간 측정"""
+    def __init__(self):
+        self.steps = []  # [(step_name, seconds)]
+        self.current = None
+        self.failed = None  # 예외가 발생한 단계
+    
+    @contextmanager
+    def step(self, name):
+        """with 블록의 소요 시간을 name 단계로 기록"""
+        self.current = name
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.failed = name
+            raise
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+    
+    def total(self):
+        return sum(seconds for _, seconds in self.steps)
+    
+    def report(self):
+        """'page_load 1.20s | date_select 0.31s | ... | 합계 2.10s' 형태의 요약"""
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.steps]
+        parts.append(f"합계 {self.total():.2f}s")
+        return " | ".join(parts)
+
+
+class MetricsRegistry:
+    """호출별 지연 시간 히스토그램, 요청/오류 수 집계 (Prometheus 텍스트 또는 JSON lines로 내보내기)"""
+    def __init__(self, path=None, format='prometheus', interval=60, buckets=LATENCY_BUCKETS):
+        if format not in METRICS_FORMATS:
+            raise ValueError(f"지원하지 않는 지표 형식입니다: {format}. 사용 가능한 형식: {list(METRICS_FORMATS)}")
+        self.path = path
+        self.format = format
+        self.interval = interval
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        # {op: {'counts': [구간별 개수 (마지막은 +Inf)], 'sum': 초, 'calls': 호출 수, 'errors': 오류 수}}
+        self.ops = {}
+        # {event: 발생 수} 지연 시간이 없는 사건 (예약 실패 분류 등)
+        self.counters = {}
+        self.last_export = time.monotonic()
+        self.logger = logging.getLogger(__name__)
+    
+    def observe(self, op, seconds, error=False):
+        """호출 한 번의 소요 시간 기록"""
+        index = bisect_left(self.buckets, seconds)
+        with self.lock:
+            stats = self.ops.get(op)
+            if stats is None:
+                stats = self.ops[op] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'calls': 0, 'errors': 0}
+            stats['counts'][index] += 1
+            stats['sum'] += seconds
+            stats['calls'] += 1
+            if error:
+                stats['errors'] += 1
+    
+    def increment(self, event, amount=1):
+        """사건 발생 수 증가"""
+        with self.lock:
+            self.counters[event] = self.counters.get(event, 0) + amount
+    
+    def counter_snapshot(self):
+        with self.lock:
+            return dict(sorted(self.counters.items()))
+    
+    @contextmanager
+    def timed(self, op):
+        """with 블록의 소요 시간을 op로 기록 (예외가 나거나 call['error']를 설정하면 오류로 집계)"""
+        call = {'error': False}
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call['error'] = True
+            raise
+        finally:
+            self.observe(op, time.perf_counter() - start, call['error'])
+    
+    def snapshot(self):
+        """현재까지의 집계 (구간별 개수는 누적값)"""
+        with self.lock:
+            ops = {op: dict(stats, counts=list(stats['counts'])) for op, stats in self.ops.items()}
+        
+        result = {}
+        for op, stats in sorted(ops.items()):
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets + ('+Inf',), stats['counts']):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            result[op] = {'calls': stats['calls'], 'errors': stats['errors'], 'sum': round(stats['sum'], 6),
+                          'buckets': buckets}
+        return result
+    
+    def to_prometheus(self):
+        """Prometheus 텍스트 형식"""
+        lines = [
+            '# HELP zeroworld_latency_seconds 호출별 소요 시간',
+            '# TYPE zeroworld_latency_seconds histogram',
+        ]
+        ops = self.snapshot()
+        for op, stats in ops.items():
+            for bound, count in stats['buckets'].items():
+                lines.append(f'zeroworld_latency_seconds_bucket{{op="{op}",le="{bound}"}} {count}')
+            lines.append(f'zeroworld_latency_seconds_sum{{op="{op}"}} {stats["sum"]}')
+            lines.append(f'zeroworld_latency_seconds_count{{op="{op}"}} {stats["calls"]}')
+        
+        for metric, key, help_text in (('zeroworld_calls_total', 'calls', '호출 수'),
+                                       ('zeroworld_errors_total', 'errors', '오류 수')):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for op, stats in ops.items():
+                lines.append(f'{metric}{{op="{op}"}} {stats[key]}')
+        
+        lines.append('# HELP zeroworld_events_total 사건 발생 수')
+        lines.append('# TYPE zeroworld_events_total counter')
+        for event, count in self.counter_snapshot().items():
+            lines.append(f'zeroworld_events_total{{event="{event}"}} {count}')
+        return "\n".join(lines) + "\n"
+    
+    def export(self):
+        """지표 파일 기록 (prometheus는 임시 파일에 쓴 뒤 교체, jsonl은 한 줄 추가)"""
+        self.last_export = time.monotonic()
+        if not self.path:
+            return
+        try:
+            if self.format == 'prometheus':
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self.to_prometheus())
+                os.replace(tmp_path, self.path)
+            else:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'time': time.time(), 'ops': self.snapshot(),
+                                        'events': self.counter_snapshot()}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self.logger.warning(f"지표 저장 실패: {e}")
+    
+    def maybe_export(self):
+        """내보내기 주기가 지났으면 기록"""
+        if time.monotonic() - self.last_export >= self.interval:
+            self.export()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """로그 레코드를 포맷하지 않고 그대로 대기열에 넣는 핸들러 (메시지 조립은 출력 스레드에서)"""
+    def prepare(self, record):
+        return record
+
+
+# 실행 중인 로그 출력 스레드 (setup_logging에서 생성)
+log_listener = None
+
+
+def setup_logging(level='INFO', path=None, format=DEFAULT_LOGGING['format']):
+    """루트 로거를 대기열 핸들러로 설정하고 콘솔/파일 출력은 백그라운드 스레드에서 처리 (다시 호출하면 설정 교체)"""
+    global log_listener
+    previous = log_listener
+    
+    formatter = logging.Formatter(format)
+    handlers = [logging.StreamHandler()]
+    if path:
+        handlers.append(logging.FileHandler(path, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    # 잘못된 로그 수준이면 기존 설정을 그대로 둔 채 실패
+    root = logging.getLogger()
+    try:
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+    except (TypeError, ValueError):
+        for handler in handlers:
+            handler.close()
+        raise
+    
+    log_queue = queue.SimpleQueue()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    
+    log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_listener.start()
+    # 새 핸들러로 교체한 뒤 이전 출력 스레드를 정리 (교체 중 로그 유실 방지)
+    if previous is not None:
+        close_listener(previous)
+    return log_listener
+
+
+def close_listener(listener):
+    """대기열에 남은 로그를 모두 출력한 뒤 출력 스레드와 핸들러 종료"""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def stop_logging():
+    """setup_logging으로 시작한 로그 출력 스레드 종료 (프로세스 종료 시 자동 호출)"""
+    global log_listener
+    if log_listener is not None:
+        close_listener(log_listener)
+        log_listener = None
+
+
+atexit.register(stop_logging)
+
+
+class SnapshotHistory:
+    """예약 현황 스냅샷을 이전 기록과 달라졌을 때만 JSON lines로 추가 기록 (파일 쓰기는 백그라운드 스레드)
+    
+    한 줄 형식: {"t": 조회 시각, "s": 지점 base_url, "d": 날짜, "m": {테마 ID: [자정 기준 분, ...]}}
+    변경이 없어도 heartbeat 주기마다 기록하므로 기록 사이 공백이 길면 감시가 멈췄던 구간으로 볼 수 있음
+    """
+    def __init__(self, path, queue_size=10000, heartbeat=600):
+        self.path = path
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.heartbeat = heartbeat
+        # {(store, date_str): (기록 시각, snapshot.theme_minutes)} 마지막으로 기록한 상태
+        self.last_recorded = {}
+        self.recorded = 0
+        self.dropped = 0
+        self.logger = logging.getLogger(__name__)
+        self.thread = threading.Thread(target=self.write_loop, name='snapshot-history', daemon=True)
+        self.thread.start()
+    
+    def record(self, store, snapshot):
+        """달라진 스냅샷(또는 heartbeat 주기가 지난 스냅샷)만 기록 대기열에 추가 (조회 스레드는 파일 쓰기를 기다리지 않음)"""
+        if snapshot is None:
+            return
+        key = (store, snapshot.date_str)
+        last = self.last_recorded.get(key)
+        if last is not None and last[1] == snapshot.theme_minutes and snapshot.fetched_at - last[0] < self.heartbeat:
+            return
+        try:
+            self.queue.put_nowait((snapshot.fetched_at, store, snapshot.date_str, snapshot.theme_minutes))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.last_recorded[key] = (snapshot.fetched_at, snapshot.theme_minutes)
+    
+    def record_all(self, snapshots):
+        """{(store, date_str): snapshot} 전체 반영"""
+        for (store, _), snapshot in snapshots.items():
+            self.record(store, snapshot)
+    
+    def write_loop(self):
+        """대기열의 스냅샷을 파일에 추가 (대기열이 비면 flush, None을 받으면 종료)"""
+        try:
+            f = open(self.path, 'a', encoding='utf-8')
+        except OSError as e:
+            self.logger.warning(f"예약 현황 기록 파일을 열 수 없습니다: {e}")
+            return
+        
+        with f:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                fetched_at, store, date_str, theme_minutes = item
+                line = {'t': round(fetched_at, 3), 's': store, 'd': date_str,
+                        'm': {theme_id: minutes.tolist() for theme_id, minutes in theme_minutes.items()}}
+                try:
+                    f.write(json.dumps(line, separators=(',', ':')) + "\n")
+                    self.recorded += 1
+                    if self.queue.empty():
+                        f.flush()
+                except OSError as e:
+                    self.logger.warning(f"예약 현황 기록 실패: {e}")
+    
+    def close(self):
+        """남은 기록을 모두 쓴 뒤 종료"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+
+def read_history(path):
+    """SnapshotHistory 파일을 읽어 (조회 시각, 지점, 날짜, {테마 ID: [분, ...]}) 순서대로 반환 (깨진 줄은 건너뜀)"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                yield entry['t'], entry['s'], entry['d'], entry['m']
+            except (ValueError, KeyError):
+                continue
+
+
+class DriverPool:
+    """Selenium 드라이버 풀 (응답 확인, 사용 횟수/메모리/수명 기준 교체, 예비 드라이버 백그라운드 준비)"""
+    def __init__(self, factory, size=1, max_uses=20, max_memory_mb=500, max_age=3600, health_timeout=3):
+        self.factory = factory
+        self.size = max(0, int(size))
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.max_age = max_age
+        self.health_timeout = health_timeout
+        
+        self.idle = []          # 바로 사용할 수 있는 예비 드라이버
+        self.uses = {}          # {id(driver): 사용 횟수}
+        self.created_at = {}    # {id(driver): 생성 시각}
+        self.launching = 0
+        # shutdown() 이후에는 새 드라이버를 보관하지 않음 (실행 중이던 드라이버는 준비되는 대로 종료)
+        self.closed = False
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='driver-pool')
+        self.logger = logging.getLogger(__name__)
+    
+    def register(self, driver):
+        with self.lock:
+            self.uses[id(driver)] = 0
+            self.created_at[id(driver)] = time.time()
+        return driver
+    
+    def warm(self):
+        """예비 드라이버가 size개가 되도록 백그라운드에서 실행"""
+        with self.lock:
+            if self.closed:
+                return
+            needed = self.size - len(self.idle) - self.launching
+            self.launching += max(0, needed)
+        for _ in range(needed):
+            self.executor.submit(self.launch)
+    
+    def launch(self):
+        try:
+            driver = self.register(self.factory())
+            with self.lock:
+                closed = self.closed
+                if not closed:
+                    self.idle.append(driver)
+            if closed:
+                self.quit(driver)
+                return
+            self.logger.info("예비 드라이버 준비 완료")
+        except Exception as e:
+            self.logger.error(f"예비 드라이버 실행 실패: {e}")
+        finally:
+            with self.lock:
+                self.launching -= 1
+    
+    def acquire(self):
+        """응답하는 예비 드라이버를 꺼내고 (없으면 바로 실행) 빈자리는 백그라운드에서 채움"""
+        while True:
+            with self.lock:
+                driver = self.idle.pop(0) if self.idle else None
+            if driver is None:
+                break
+            if self.is_healthy(driver):
+                self.warm()
+                return driver
+            self.retire(driver)
+        
+        driver = self.register(self.factory())
+        self.warm()
+        return driver
+    
+    def is_healthy(self, driver):
+        """제한 시간 안에 스크립트 실행에 응답하는지 확인 (멈춘 드라이버가 호출을 막지 않도록 별도 스레드)"""
+        result = {}
+        
+        def ping():
+            try:
+                result['ok'] = driver.execute_script('return 1') == 1
+            except Exception:
+                result['ok'] = False
+        
+        thread = threading.Thread(target=ping, name='driver-ping', daemon=True)
+        thread.start()
+        thread.join(self.health_timeout)
+        return result.get('ok', False)
+    
+    def memory_mb(self, driver):
+        """현재 페이지의 JS 힙 사용량 (MB, 확인할 수 없으면 0)"""
+        try:
+            used = driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0")
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0
+    
+    def release(self, driver, failed=False):
+        """사용 후 반납 - 교체 기준에 걸리면 종료하고 False 반환 (호출 측은 드라이버를 버림)"""
+        with self.lock:
+            self.uses[id(driver)] = self.uses.get(id(driver), 0) + 1
+            uses = self.uses[id(driver)]
+            age = time.time() - self.created_at.get(id(driver), time.time())
+        
+        reason = None
+        if failed and not self.is_healthy(driver):
+            reason = "응답 없음"
+        elif uses >= self.max_uses:
+            reason = f"사용 {uses}회"
+        elif age >= self.max_age:
+            reason = f"실행 {age:.0f}초"
+        else:
+            memory = self.memory_mb(driver)
+            if memory >= self.max_memory_mb:
+                reason = f"메모리 {memory:.0f}MB"
+        
+        if reason is None:
+            return True
+        self.logger.info(f"드라이버 교체: {reason}")
+        self.retire(driver)
+        self.warm()
+        return False
+    
+    def retire(self, driver):
+        """드라이버를 백그라운드에서 종료 (풀이 이미 종료되었으면 바로 종료)"""
+        with self.lock:
+            self.uses.pop(id(driver), None)
+            self.created_at.pop(id(driver), None)
+        try:
+            self.executor.submit(self.quit, driver)
+        except RuntimeError:
+            self.quit(driver)
+    
+    def quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"드라이버 종료 실패: {e}")
+    
+    def shutdown(self):
+        """예비 드라이버 종료 (실행 중인 드라이버는 준비되는 즉시 종료)"""
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        for driver in idle:
+            self.quit(driver)
+        self.executor.shutdown(wait=False)
+
+
+class SessionManager:
+    """CSRF 토큰과 세션 쿠키 수명 관리 (만료 추적, 백그라운드 갱신)"""
+    def __init__(self, reservation, max_age=SESSION_MAX_AGE, refresh_margin=SESSION_REFRESH_MARGIN):
+        self.reservation = reservation
+        self.max_age = max_age
+        self.refresh_margin = refresh_margin
+        # 토큰 획득/갱신은 한 번에 하나만 수행
+        self.lock = threading.RLock()
+        self.acquired_at = None
+        self.expires_at = None
+        self.cookies_synced = False
+        self.refresh_count = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def mark_acquired(self, cookies=None):
+        """토큰/쿠키 획득 시각과 만료 시각 기록 (세션/XSRF 쿠키 expiry 중 가장 이른 값 기준)"""
+        now = time.time()
+        self.acquired_at = now
+        self.expires_at = now + self.max_age
+        for cookie in cookies or []:
+            expiry = cookie.get('expiry')
+            if expiry and self.is_session_cookie(cookie.get('name', '')):
+                self.expires_at = min(self.expires_at, expiry)
+    
+    def is_session_cookie(self, name):
+        return name in SESSION_COOKIE_NAMES or name.endswith(SESSION_COOKIE_SUFFIX)
+    
+    def invalidate(self):
+        """서버가 세션 만료를 알린 경우 다음 요청에서 재발급되도록 표시"""
+        self.expires_at = 0
+        self.cookies_synced = False
+    
+    def is_expired(self, margin=0):
+        return self.expires_at is None or time.time() >= self.expires_at - margin
+    
+    def refresh(self, stale_token=None):
+        """토큰 재발급 (stale_token이 이미 교체되었다면 재발급하지 않음)"""
+        with self.lock:
+            current = self.reservation.csrf_token
+            if stale_token is not None and current and current != stale_token:
+                return current
+            
+            self.refresh_count += 1
+            self.reservation.logger.info(f"CSRF 토큰/세션 쿠키 갱신 ({self.refresh_count}회)")
+            return self.reservation.get_csrf_token(force_refresh=True)
+    
+    def start(self):
+        """만료 전에 토큰을 미리 갱신하는 백그라운드 스레드 시작"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name='session-refresher', daemon=True)
+        self.thread.start()
+    
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.expires_at is None:
+                wait = self.refresh_margin
+            else:
+                wait = max(1, self.expires_at - self.refresh_margin - time.time())
+            if self.stop_event.wait(wait):
+                break
+            if self.acquired_at is not None and self.is_expired(self.refresh_margin):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.reservation.logger.error(f"백그라운드 세션 갱신 실패: {e}")
+    
+    def stop(self):
+        self.stop_event.set()
+
+
+class RateLimiter:
+    """지점별 요청 속도 제한 (토큰 버킷, 여러 스레드에서 공유)"""
+    def __init__(self, qps):
+        self.qps = qps
+        self.capacity = max(1.0, float(qps or 0))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """요청 1회분 토큰을 얻을 때까지 대기"""
+        if not self.qps:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.qps)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.qps
+            time.sleep(wait)
+
+
+class CancellationPredictor:
+    """지점/테마/대상 날짜 요일/시간대별로 마감된 슬롯이 다시 열린(취소) 빈도를 학습해 시간당 발생률 추정
+    
+    예약 현황 기록(read_history)과 실행 중 조회 결과를 같은 방식으로 반영하며, 기록이 적은 구간은 prior_rate 쪽으로 보정
+    """
+    def __init__(self, prior_rate=0.05, prior_hours=12, min_factor=0.5, max_factor=4, max_gap=None):
+        self.prior_rate = prior_rate
+        self.prior_hours = prior_hours
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.max_gap = max_gap if max_gap is not None else prediction_max_gap(None, max_factor)
+        # {(store, theme_id, weekday, hour): 다시 열린 슬롯 수} - theme_id None은 전체 테마 합계
+        self.events = {}
+        # {(store, weekday, hour): 관찰 시간(초)}
+        self.exposure = {}
+        # {(store, date_str): (조회 시각, theme_minutes)} 직전 관찰
+        self.last_seen = {}
+    
+    def observe(self, store, date_str, fetched_at, theme_minutes):
+        """스냅샷 하나 반영 (직전 관찰과의 간격은 관찰 시간, 직전에 닫혀 있다가 열린 슬롯은 취소로 집계)"""
+        key = (store, date_str)
+        previous = self.last_seen.get(key)
+        self.last_seen[key] = (fetched_at, theme_minutes)
+        if previous is None:
+            return
+        
+        previous_at, previous_minutes = previous
+        gap = fetched_at - previous_at
+        if gap <= 0 or gap > self.max_gap:
+            return
+        
+        weekday = datetime.strptime(date_str, '%Y-%m-%d').weekday()
+        hour = datetime.fromtimestamp(fetched_at).hour
+        exposure_key = (store, weekday, hour)
+        self.exposure[exposure_key] = self.exposure.get(exposure_key, 0) + gap
+        if previous_minutes == theme_minutes:
+            return
+        
+        for theme_id, minutes in theme_minutes.items():
+            # 직전 관찰에 없던 테마(날짜가 처음 열린 경우)는 취소가 아니므로 제외
+            if theme_id not in previous_minutes:
+                continue
+            reopened = len(set(minutes) - set(previous_minutes[theme_id]))
+            if reopened:
+                for event_key in ((store, theme_id, weekday, hour), (store, None, weekday, hour)):
+                    self.events[event_key] = self.events.get(event_key, 0) + reopened
+    
+    def observe_all(self, snapshots):
+        """{(store, date_str): snapshot} 전체 반영 (조회 실패는 건너뜀)"""
+        for (store, date_str), snapshot in snapshots.items():
+            if snapshot is not None:
+                self.observe(store, date_str, snapshot.fetched_at, snapshot.theme_minutes)
+    
+    def load(self, path):
+        """예약 현황 기록 파일로 학습 (반영한 줄 수 반환)"""
+        count = 0
+        for fetched_at, store, date_str, theme_minutes in read_history(path):
+            self.observe(store, date_str, fetched_at, theme_minutes)
+            count += 1
+        return count
+    
+    def rate(self, store, date_str, theme_ids=None, at=None):
+        """해당 날짜의 테마들(없으면 전체 테마)에서 시간당 취소가 나올 것으로 예상되는 수"""
+        at = at or datetime.now()
+        weekday = datetime.strptime(date_str, '%Y-%m-%d').weekday()
+        hours = self.exposure.get((store, weekday, at.hour), 0) / 3600
+        if theme_ids:
+            events = sum(self.events.get((store, theme_id, weekday, at.hour), 0) for theme_id in theme_ids)
+            prior = self.prior_rate * len(theme_ids)
+        else:
+            events = self.events.get((store, None, weekday, at.hour), 0)
+            prior = self.prior_rate
+        return (events + prior * self.prior_hours) / (hours + self.prior_hours)
+    
+    def factors(self, target_themes, at=None):
+        """{(store, date_str): theme_ids}별 조회 간격 배수 (취소 가능성에 반비례, 전체 요청 수는 기본 간격과 비슷하게 유지)"""
+        rates = {key: self.rate(key[0], key[1], theme_ids, at) for key, theme_ids in target_themes.items()}
+        if not rates:
+            return {}
+        mean_rate = sum(rates.values()) / len(rates)
+        return {key: min(self.max_factor, max(self.min_factor, mean_rate / rate if rate else self.max_factor))
+                for key, rate in rates.items()}
+
+
+class PollScheduler:
+    """조회 주기 결정 (릴리스 시각 전후 고빈도 조회, 오류/한산한 시간 지수 백오프, 취소 가능성에 따른 날짜별 조회 간격)"""
+    def __init__(self, base_interval, schedule=None, predictor=None):
+        options = dict(DEFAULT_SCHEDULE)
+        options.update(schedule or {})
+        
+        self.base_interval = base_interval
+        self.release_times = [datetime.strptime(t, '%H:%M').time() for t in options['release_times']]
+        self.burst_window = options['burst_window']
+        self.burst_interval = options['burst_interval']
+        self.max_interval = options['max_interval']
+        self.backoff_factor = options['backoff_factor']
+        self.jitter = options['jitter']
+        quiet_hours = options['quiet_hours']
+        if quiet_hours:
+            self.quiet_hours = (datetime.strptime(quiet_hours['start'], '%H:%M').time(),
+                                datetime.strptime(quiet_hours['end'], '%H:%M').time())
+        else:
+            self.quiet_hours = None
+        
+        self.consecutive_errors = 0
+        self.idle_cycles = 0
+        # 한산한 시간대가 시작된 시점의 idle_cycles (한산한 시간대가 아니면 None)
+        self.quiet_start_cycle = None
+        self.burst_until = 0
+        # 테마 정보가 열린(선택 가능한) 날짜 {(base_url, date_str)}
+        self.open_dates = None
+        
+        # 취소 패턴 예측기 (None이면 모든 날짜를 매 주기 조회)
+        self.predictor = predictor
+        # {(base_url, date_str): 조회 간격 배수}, {(base_url, date_str): 마지막 조회 시각 (monotonic)}
+        self.factors = {}
+        self.last_polled = {}
+        # 날짜별 조회 간격의 기준 (마지막으로 계산한 전체 주기)
+        self.cycle_interval = base_interval
+    
+    def record_cycle(self, snapshots, target_themes=None):
+        """한 주기 조회 결과 반영 ({key: snapshot}, 조회 실패는 None / target_themes는 전체 조회 대상별 테마 ID)"""
+        if self.predictor is not None:
+            polled_at = time.monotonic()
+            for key in snapshots:
+                self.last_polled[key] = polled_at
+            self.predictor.observe_all(snapshots)
+            if target_themes is not None:
+                self.factors = self.predictor.factors(target_themes)
+                self.last_polled = {key: at for key, at in self.last_polled.items() if key in target_themes}
+        
+        if any(snapshot is None for snapshot in snapshots.values()):
+            self.consecutive_errors += 1
+        else:
+            self.consecutive_errors = 0
+        
+        open_dates = {key for key, snapshot in snapshots.items() if snapshot is not None and snapshot.theme_mapping}
+        if self.open_dates is not None and open_dates - self.open_dates:
+            # 새 날짜가 선택 가능해진 직후에는 고빈도 조회
+            self.burst_until = time.time() + self.burst_window
+            self.idle_cycles = 0
+            if self.quiet_start_cycle is not None:
+                self.quiet_start_cycle = 0
+        else:
+            self.idle_cycles += 1
+        self.open_dates = open_dates if self.open_dates is None else self.open_dates | open_dates
+    
+    def release_windows(self, now):
+        """now 전후의 릴리스 시각 목록 (어제/오늘/내일)"""
+        windows = []
+        for release_time in self.release_times:
+            release_at = datetime.combine(now.date(), release_time)
+            windows.extend([release_at - timedelta(days=1), release_at, release_at + timedelta(days=1)])
+        return windows
+    
+    def in_burst(self, now):
+        if time.time() < self.burst_until:
+            return True
+        return any(abs((now - release_at).total_seconds()) <= self.burst_window for release_at in self.release_windows(now))
+    
+    def in_quiet_hours(self, now):
+        if not self.quiet_hours:
+            return False
+        start, end = self.quiet_hours
+        current = now.time()
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+    
+    def seconds_until_next_burst(self, now):
+        """다음 고빈도 조회 구간 시작까지 남은 시간 (없으면 None)"""
+        waits = [
+            (release_at - now).total_seconds() - self.burst_window
+            for release_at in self.release_windows(now)
+        ]
+        waits = [wait for wait in waits if wait > 0]
+        return min(waits) if waits else None
+    
+    def next_delay(self, now=None):
+        """다음 조회까지 대기할 시간 (초)"""
+        now = now or datetime.now()
+        
+        # 한산한 시간대 백오프는 그 시간대에 들어선 뒤의 주기 수 기준
+        if self.in_quiet_hours(now):
+            if self.quiet_start_cycle is None:
+                self.quiet_start_cycle = self.idle_cycles
+        else:
+            self.quiet_start_cycle = None
+        
+        if self.consecutive_errors:
+            delay = self.backoff(self.consecutive_errors)
+        elif self.in_burst(now):
+            delay = self.burst_interval
+        elif self.quiet_start_cycle is not None:
+            delay = self.backoff(self.idle_cycles - self.quiet_start_cycle)
+        else:
+            delay = self.base_interval
+        
+        delay = min(delay, self.max_interval)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        
+        # 날짜별 조회 간격을 쓰면 가장 먼저 조회할 날짜의 시각까지만 대기
+        self.cycle_interval = delay
+        if self.uses_factors(now):
+            delay = self.seconds_until_due()
+        
+        # 고빈도 조회 구간이 시작되기 전에 깨어나도록 제한
+        until_burst = self.seconds_until_next_burst(now)
+        if until_burst is not None:
+            delay = min(delay, until_burst)
+        
+        return max(delay, 0.1)
+    
+    def backoff(self, count):
+        """기본 간격에 backoff_factor를 count번 곱한 간격 (max_interval에 도달하면 더 곱하지 않음)"""
+        delay = self.base_interval
+        for _ in range(count):
+            if delay >= self.max_interval:
+                break
+            delay *= self.backoff_factor
+        return delay
+    
+    def uses_factors(self, now=None):
+        """날짜별 조회 간격 적용 여부 (오류 백오프/고빈도 조회 중에는 모든 날짜를 함께 조회)"""
+        return bool(self.factors) and not self.consecutive_errors and not self.in_burst(now or datetime.now())
+    
+    def due_at(self, key):
+        last = self.last_polled.get(key)
+        if last is None:
+            return 0
+        return last + self.cycle_interval * self.factors.get(key, 1)
+    
+    def seconds_until_due(self):
+        current = time.monotonic()
+        return max(0, min(self.due_at(key) - current for key in self.factors))
+    
+    def due_targets(self, keys):
+        """이번 주기에 조회할 (base_url, date_str) 목록 (None이면 전체)
+        
+        곧 조회할 날짜(기준 주기의 10% 이내)도 함께 조회해 요청을 한 번에 보냄
+        """
+        if not self.uses_factors():
+            return None
+        deadline = time.monotonic() + self.cycle_interval * 0.1
+        due = {key for key in keys if self.due_at(key) <= deadline}
+        if not due:
+            due = {min(keys, key=self.due_at)} if keys else set()
+        return due
+
+
+class AvailabilityPoller:
+    """여러 날짜의 예약 현황을 스레드 풀로 동시에 조회"""
+    def __init__(self, max_workers=DEFAULT_MAX_CONCURRENCY):
+        self.max_workers = max(1, int(max_workers))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='poller')
+    
+    def poll(self, reservation, target_dates, user_info=None):
+        """target_dates 순서를 유지한 스냅샷 목록 반환 (조회 실패 시 None)"""
+        return self.poll_many([(reservation, target_date) for target_date in target_dates], user_info)
+    
+    def poll_many(self, targets, user_info=None):
+        """여러 지점의 (reservation, target_date) 목록을 한 번에 조회 (순서 유지)"""
+        # 브라우저를 띄울 수 있는 토큰 획득과 쿠키 동기화는 조회 전에 지점별로 한 번만 수행
+        ready = {}
+        for reservation, _ in targets:
+            if id(reservation) not in ready:
+                ready[id(reservation)] = bool(reservation.get_csrf_token())
+                if ready[id(reservation)]:
+                    reservation.sync_session_cookies()
+                else:
+                    reservation.logger.error("CSRF 토큰을 획득할 수 없습니다")
+        
+        futures = [
+            self.executor.submit(reservation.fetch_availability_snapshot, target_date, user_info, False)
+            if ready[id(reservation)] else None
+            for reservation, target_date in targets
+        ]
+        return [future.result() if future else None for future in futures]
+    
+    def shutdown(self):
+        """스레드 풀 종료"""
+        self.executor.shutdown(wait=False)
+
+
 class ZeroWorldReservation:
-    def __init__(self, store='gangnam'):
+    def __init__(self, store='gangnam', booking_mode='http', step_timeouts=None, bootstrap_mode='http', headless=False,
+                 max_qps=DEFAULT_MAX_QPS, transport=None, theme_catalog=None, booking_verify=None, metrics=None,
+                 driver_pool=None, booking_retry=None):
         # 지점 설정
         if store not in STORE_CONFIGS:
             raise ValueError(f"지원하지 않는 지점입니다: {store}. 사용 가능한 지점: {list(STORE_CONFIGS.keys())}")
+        if booking_mode not in BOOKING_MODES:
+            raise ValueError(f"지원하지 않는 예약 방식입니다: {booking_mode}. 사용 가능한 방식: {list(BOOKING_MODES)}")
+        if bootstrap_mode not in BOOTSTRAP_MODES:
+            raise ValueError(f"지원하지 않는 토큰 획득 방식입니다: {bootstrap_mode}. 사용 가능한 방식: {list(BOOTSTRAP_MODES)}")
         
+        self.store = store
         self.store_config = STORE_CONFIGS[store]
         self.base_url = self.store_config['base_url']
         self.reservation_url = f"{self.base_url}/reservation"
+        self.booking_url = f"{self.base_url}{self.store_config.get('booking_path', '/reservation')}"
         self.store_name = self.store_config['name']
+        self.booking_mode = booking_mode
+        self.bootstrap_mode = bootstrap_mode
+        self.headless = headless
+        
+        # Selenium 단계별 대기 시간 (설정값으로 일부 덮어쓰기 가능)
+        self.step_timeouts = dict(SELENIUM_STEP_TIMEOUTS)
+        if step_timeouts:
+            self.step_timeouts.update(step_timeouts)
+        self.booking_verify = dict(BOOKING_VERIFY)
+        if booking_verify:
+            self.booking_verify.update(booking_verify)
+        self.booking_retry = dict(BOOKING_RETRY)
+        if booking_retry:
+            self.booking_retry.update(booking_retry)
+        # 호출별 지연 시간/오류 집계 (여러 지점이 하나를 공유할 수 있음)
+        self.metrics = metrics or MetricsRegistry()
+        
+        # HTTP 전송 설정 (연결 풀, 재시도, 제한 시간)
+        self.transport = dict(DEFAULT_TRANSPORT)
+        if transport:
+            self.transport.update(transport)
+        self.timeout = (self.transport['connect_timeout'], self.transport['read_timeout'])
+        self.session = self.create_session()
         
-        self.session = requests.Session()
+        # 지점별 AJAX 헤더는 한 번만 만들고 토큰이 바뀔 때만 다시 생성
+        self.api_headers = dict(AJAX_HEADERS, referer=self.reservation_url)
+        self.headers_cache = {}
+        
+        # 지점별 조회 요청 속도 제한 (STORE_CONFIGS의 max_qps가 우선)
+        self.rate_limiter = RateLimiter(self.store_config.get('max_qps', max_qps))
+        # 현재 사용 중인 드라이버 (대기 예약 화면 유지), 예비 드라이버는 풀에서 관리
         self.driver = None
+        self.driver_pool_config = dict(DEFAULT_DRIVER_POOL)
+        if driver_pool:
+            self.driver_pool_config.update(driver_pool)
+        self.driver_pool = None
         self.csrf_token = None
+        # 브라우저는 스레드 간 공유할 수 없으므로 조작 시 잠금
+        self.driver_lock = threading.RLock()
+        self.session_manager = SessionManager(self)
+        
+        # 대기 예약 화면 상태 (날짜 선택, 사용자 정보 입력이 끝난 페이지)
+        self.standby_date = None
+        self.standby_user_info = None
+        self.standby_prepared_at = None
+        # 준비 실패가 이어지면 다음 재시도 시각까지 기다림
+        self.standby_failures = 0
+        self.standby_retry_at = None
         
-        # 로깅 설정
-        logging.basicConfig(level=logging.INFO)
+        # 로그 출력 방식은 setup_logging에서 한 번만 설정
         self.logger = logging.getLogger(__name__)
         self.logger.info(f"예약 시스템 초기화: {self.store_name}")
         
-        # 날짜별 동적 테마 매핑 저장소 {date_str: {theme_name: theme_id}}
-        self.date_theme_mappings = {}
+        # 날짜별 동적 테마 매핑 캐시 {(store, date_str): {theme_name: theme_id}} - 여러 지점이 공유 가능
+        self.theme_catalog = theme_catalog or ThemeCatalog()
+        
+        # 날짜별 최신 예약 현황 스냅샷 {date_str: AvailabilitySnapshot}
+        self.date_snapshots = {}
+        
+        # 시간 구간 설정별로 미리 변환한 TimeWindows
+        self.time_windows_cache = {}
         
         # requests 로깅 비활성화
         import urllib3
@@ -41,29 +1459,132 @@ class ZeroWorldReservation:
         logging.getLogger("requests").setLevel(logging.WARNING)
         logging.getLogger("urllib3").setLevel(logging.WARNING)
         
-    def setup_driver(self, headless=False):
-        """Chrome WebDriver 설정"""
+    def setup_driver(self, headless=None):
+        """사용할 드라이버 준비 (풀에서 꺼내고 예비 드라이버는 백그라운드에서 실행)"""
+        if headless is not None:
+            self.headless = headless
+        with self.driver_lock:
+            return self.checkout_driver()
+    
+    def get_driver_pool(self):
+        if self.driver_pool is None:
+            self.driver_pool = DriverPool(self.create_driver, **self.driver_pool_config)
+        return self.driver_pool
+    
+    def checkout_driver(self):
+        """사용할 드라이버 확보 (응답하지 않는 드라이버는 교체) - driver_lock을 잡은 상태에서 호출"""
+        pool = self.get_driver_pool()
+        if self.driver is not None and not pool.is_healthy(self.driver):
+            self.logger.warning("드라이버가 응답하지 않아 교체합니다")
+            pool.retire(self.driver)
+            self.driver = None
+            self.clear_standby()
+        if self.driver is None:
+            self.driver = pool.acquire()
+        return self.driver
+    
+    def checkin_driver(self, failed=False):
+        """드라이버 사용 종료 (교체 기준에 걸리면 다음 사용 때 예비 드라이버로 바꿈)"""
+        if self.driver is not None and not self.get_driver_pool().release(self.driver, failed):
+            self.driver = None
+            self.clear_standby()
+    
+    def create_driver(self):
+        """Chrome WebDriver 생성"""
         chrome_options = Options()
-        if headless:
+        if self.headless:
             chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
         
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.implicitly_wait(10)
+        driver = webdriver.Chrome(options=chrome_options)
+        # 암묵적 대기 대신 단계별 명시적 대기(wait_for) 사용
+        driver.implicitly_wait(0)
+        driver.set_page_load_timeout(self.step_timeouts['page_load'])
+        return driver
+    
+    def wait_for(self, step, condition):
+        """단계별 시간 상한 내에서 condition이 만족될 때까지 대기"""
+        return WebDriverWait(self.driver, self.step_timeouts[step], poll_frequency=0.1).until(condition)
     
     def get_csrf_token(self, force_refresh=False):
-        """CSRF 토큰 획득"""
-        if self.csrf_token and not force_refresh:
+        """CSRF 토큰 획득 (만료 전까지 캐시, 획득 시 세션 쿠키도 함께 동기화)"""
+        if self.csrf_token and not force_refresh and not self.session_manager.is_expired():
             return self.csrf_token
+        
+        with self.session_manager.lock:
+            # 다른 스레드가 먼저 갱신한 경우
+            if self.csrf_token and not force_refresh and not self.session_manager.is_expired():
+                return self.csrf_token
             
-        if not self.driver:
-            self.setup_driver(headless=False)
+            with self.metrics.timed('csrf_token') as call:
+                token = self.bootstrap_csrf_token()
+                call['error'] = not token
+            return token
+    
+    def bootstrap_csrf_token(self):
+        """bootstrap_mode에 따라 HTML 또는 브라우저로 새 CSRF 토큰 획득"""
+        # 브라우저 없이 먼저 시도
+        if self.bootstrap_mode == 'http':
+            token = self.acquire_csrf_token_http()
+            if token:
+                return token
+            self.logger.info("HTML에서 CSRF 토큰을 찾지 못해 브라우저로 재시도")
+        
+        with self.driver_lock:
+            token = self.acquire_csrf_token()
+            if token:
+                self.sync_session_cookies(force=True)
+        return token
+    
+    def acquire_csrf_token_http(self):
+        """브라우저 없이 예약 페이지 HTML에서 CSRF 토큰 획득 (쿠키는 세션에 직접 저장됨)"""
+        try:
+            response = self.session.get(self.reservation_url, headers={
+                'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'accept-language': AJAX_HEADERS['accept-language'],
+                'user-agent': AJAX_HEADERS['user-agent']
+            }, timeout=self.timeout)
+            if response.status_code != 200:
+                self.logger.warning(f"예약 페이지 요청 실패: {response.status_code}")
+                return None
+            
+            token = self.extract_csrf_token(response.text)
+            if not token:
+                return None
+            
+            self.csrf_token = token
+            # 세션이 받은 쿠키를 그대로 사용하므로 브라우저 쿠키는 복사하지 않음
+            self.session_manager.mark_acquired([{'name': cookie.name, 'expiry': cookie.expires}
+                                                for cookie in self.session.cookies])
+            self.session_manager.cookies_synced = True
+            return token
+            
+        except Exception as e:
+            self.logger.warning(f"HTML 기반 CSRF 토큰 획득 실패: {e}")
+            return None
+    
+    def extract_csrf_token(self, html):
+        """예약 페이지 HTML에서 CSRF 토큰 추출 (meta, _token input, window.Laravel)"""
+        for pattern in CSRF_HTML_PATTERNS:
+            match = pattern.search(html)
+            if match:
+                return match.group(1)
+        return None
+    
+    def acquire_csrf_token(self):
+        """브라우저로 예약 페이지를 열어 CSRF 토큰 획득"""
+        try:
+            self.checkout_driver()
+        except Exception as e:
+            self.logger.error(f"드라이버 실행 실패: {e}")
+            return None
         
         try:
             self.driver.get(self.reservation_url)
-            time.sleep(2)
+            # 페이지를 이동했으므로 대기 예약 화면은 다시 준비해야 함
+            self.clear_standby()
             
             # meta 태그에서 CSRF 토큰 찾기
             csrf_selectors = [
@@ -73,15 +1594,17 @@ class ZeroWorldReservation:
                 '[name="csrf_token"]'
             ]
             
+            try:
+                self.wait_for('page_load', EC.presence_of_element_located((By.CSS_SELECTOR, ', '.join(csrf_selectors))))
+            except TimeoutException:
+                self.logger.warning("CSRF 토큰 요소 대기 시간 초과")
+            
             for selector in csrf_selectors:
-                try:
-                    element = self.driver.find_element(By.CSS_SELECTOR, selector)
+                for element in self.driver.find_elements(By.CSS_SELECTOR, selector):
                     token = element.get_attribute('content') or element.get_attribute('value')
                     if token:
                         self.csrf_token = token
                         return token
-                except:
-                    continue
             
             # JavaScript로 토큰 찾기 시도
             try:
@@ -101,48 +1624,76 @@ class ZeroWorldReservation:
             
         except Exception as e:
             self.logger.error(f"CSRF 토큰 획득 실패: {e}")
+            self.checkin_driver(failed=True)
             return None
     
-    def sync_session_cookies(self):
-        """Selenium과 requests 세션 쿠키 동기화"""
+    def sync_session_cookies(self, force=False):
+        """Selenium과 requests 세션 쿠키 동기화 (토큰 획득 후 한 번만 복사)"""
+        if self.session_manager.cookies_synced and not force:
+            return
+        
         try:
+            selenium_cookies = []
             if self.driver:
-                selenium_cookies = self.driver.get_cookies()
+                with self.driver_lock:
+                    selenium_cookies = self.driver.get_cookies()
                 for cookie in selenium_cookies:
-                    self.session.cookies.set(cookie['name'], cookie['value'])
+                    self.session.cookies.set(cookie['name'], cookie['value'],
+                                             domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+            self.session_manager.mark_acquired(selenium_cookies)
+            self.session_manager.cookies_synced = True
         except Exception as e:
             self.logger.error(f"쿠키 동기화 실패: {e}")
         
-    def get_available_times_for_theme(self, target_date, theme_id, user_info=None, theme_name=None):
-        """특정 테마의 예약 가능한 시간 조회"""
+    def create_session(self):
+        """연결 풀 크기와 재시도 정책을 적용한 requests 세션 생성"""
+        session = requests.Session()
+        
+        # 연결 단계 실패만 재시도하므로 예약 POST가 중복 전송되지 않음
+        retry = Retry(
+            total=self.transport['retries'],
+            connect=self.transport['retries'],
+            read=self.transport['retries'],
+            status=self.transport['retries'],
+            backoff_factor=self.transport['backoff_factor'],
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.transport['pool_connections'],
+            pool_maxsize=self.transport['pool_maxsize'],
+            max_retries=retry
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def build_request_headers(self, csrf_token):
+        """예약 페이지 AJAX 요청과 동일한 헤더 (토큰별로 캐시)"""
+        headers = self.headers_cache.get(csrf_token)
+        if headers is None:
+            headers = dict(self.api_headers)
+            headers['x-csrf-token'] = csrf_token
+            self.headers_cache = {csrf_token: headers}
+        return headers
+    
+    def fetch_availability_snapshot(self, target_date, user_info=None, sync_cookies=True):
+        """특정 날짜의 예약 현황을 한 번 조회해 스냅샷으로 저장"""
         try:
             # CSRF 토큰 획득
             csrf_token = self.get_csrf_token()
             if not csrf_token:
                 self.logger.error("CSRF 토큰을 획득할 수 없습니다")
-                return []
+                return None
             
-            # 세션 쿠키 동기화
-            self.sync_session_cookies()
+            # 세션 쿠키 동기화 (동시 조회 시에는 AvailabilityPoller가 미리 수행)
+            if sync_cookies:
+                self.sync_session_cookies()
             
             # API 호출
             api_url = f"{self.base_url}/reservation/theme"
-            
-            headers = {
-                'accept': 'application/json, text/javascript, */*; q=0.01',
-                'accept-language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
-                'content-type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                'sec-ch-ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"macOS"',
-                'sec-fetch-dest': 'empty',
-                'sec-fetch-mode': 'cors',
-                'sec-fetch-site': 'same-origin',
-                'x-csrf-token': csrf_token,
-                'x-requested-with': 'XMLHttpRequest',
-                'referer': self.reservation_url,
-                'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
+            headers = self.build_request_headers(csrf_token)
             
             # POST 데이터 준비
             data = {
@@ -152,64 +1703,110 @@ class ZeroWorldReservation:
                 'paymentType': '1'
             }
             
-            response = self.session.post(api_url, headers=headers, data=data)
+            self.rate_limiter.acquire()
+            with self.metrics.timed('availability_request') as call:
+                response = self.session.post(api_url, headers=headers, data=data, timeout=self.timeout)
+                call['error'] = response.status_code != 200
+            
+            # 토큰/세션 만료 시 한 번만 갱신 후 재시도
+            if response.status_code in SESSION_EXPIRED_STATUSES:
+                self.logger.warning(f"세션 만료 감지 ({response.status_code}), 토큰 갱신 후 재시도")
+                csrf_token = self.session_manager.refresh(stale_token=csrf_token)
+                if not csrf_token:
+                    self.logger.error("세션 갱신 실패: CSRF 토큰을 다시 획득할 수 없습니다")
+                    return None
+                headers = self.build_request_headers(csrf_token)
+                self.rate_limiter.acquire()
+                with self.metrics.timed('availability_request') as call:
+                    response = self.session.post(api_url, headers=headers, data=data, timeout=self.timeout)
+                    call['error'] = response.status_code != 200
+                if response.status_code in SESSION_EXPIRED_STATUSES:
+                    self.session_manager.invalidate()
+                    self.logger.error(f"세션 갱신 후에도 요청 거부: {response.status_code}")
+                    return None
             
             if response.status_code == 200:
-                try:
-                    result = response.json()
+                with self.metrics.timed('availability_parse') as call:
+                    try:
+                        result = response.json()
+                    except ValueError as e:
+                        call['error'] = True
+                        self.logger.error(f"JSON 파싱 실패: {e}")
+                        return None
                     
-                    # 응답에서 특정 테마의 예약 가능한 시간 추출
+                    # 한 번의 응답에서 테마 매핑과 테마별 예약 가능 시간을 함께 추출
+                    date_str = target_date.strftime('%Y-%m-%d')
                     theme_mapping = self.extract_theme_info(result)
-                    
-                    # 날짜별 테마 매핑 업데이트
-                    if theme_mapping:
-                        date_str = target_date.strftime('%Y-%m-%d')
-                        self.date_theme_mappings[date_str] = theme_mapping
-                    
-                    available_times = self.extract_available_times(result, target_theme_id=theme_id, theme_name=theme_name, target_date=target_date)
-                    
-                    return available_times
-                    
-                except ValueError as e:
-                    self.logger.error(f"JSON 파싱 실패: {e}")
-                    return []
+                    theme_minutes = self.extract_minutes_by_theme(result)
+                    snapshot = AvailabilitySnapshot(date_str, theme_mapping, theme_minutes)
+                
+                # 날짜별 테마 매핑 업데이트
+                if theme_mapping:
+                    self.theme_catalog.put(self.store, date_str, theme_mapping)
+                self.date_snapshots[date_str] = snapshot
+                
+                return snapshot
             else:
                 self.logger.error(f"API 요청 실패: {response.status_code}")
-                return []
+                return None
                 
         except Exception as e:
-            self.logger.error(f"예약 가능 시간 조회 실패: {e}")
-            return []
+            self.logger.error(f"예약 현황 조회 실패: {e}")
+            return None
     
-    def extract_available_times(self, api_response, target_theme_id=None, theme_name=None, target_date=None):
-        """API 응답에서 예약 가능한 시간 추출 (특정 테마 필터링 지원)"""
-        available_times = []
+    def get_available_times_for_theme(self, target_date, theme_id, user_info=None, theme_name=None):
+        """특정 테마의 예약 가능한 시간 조회"""
+        with self.metrics.timed('available_times') as call:
+            snapshot = self.fetch_availability_snapshot(target_date, user_info)
+            if snapshot is None:
+                call['error'] = True
+                return []
+            
+            return self.extract_available_times(snapshot, target_theme_id=theme_id, theme_name=theme_name, target_date=target_date)
+    
+    def extract_minutes_by_theme(self, api_response):
+        """API 응답의 times 데이터를 테마별 예약 가능 시간(자정 기준 분 배열)으로 변환"""
+        theme_minutes = {}
         
         try:
-            if isinstance(api_response, dict) and 'times' in api_response:
-                times_data = api_response['times']
-                
-                for theme_id, time_slots in times_data.items():
-                    # 특정 테마 ID가 지정된 경우 해당 테마만 필터링
-                    if target_theme_id is not None and str(theme_id) != str(target_theme_id):
+            times_data = api_response.get('times') if isinstance(api_response, dict) else None
+            if not times_data:
+                return theme_minutes
+            
+            for theme_id, time_slots in times_data.items():
+                minutes = array('H')
+                for slot in time_slots or ():
+                    # 형식이 다른 항목은 건너뜀 (슬롯마다 타입 검사를 하지 않음)
+                    try:
+                        if not slot['reservation']:
+                            minutes.append(parse_minutes(slot['time']))
+                    except (TypeError, KeyError, ValueError, IndexError):
                         continue
-                    
-                    if isinstance(time_slots, list):
-                        for slot in time_slots:
-                            if isinstance(slot, dict) and 'time' in slot and 'reservation' in slot:
-                                if not slot['reservation']:
-                                    time_str = slot['time']
-                                    # HH:MM:SS 형식을 HH:MM으로 변환
-                                    if time_str.count(':') == 2:
-                                        time_str = time_str.rsplit(':', 1)[0]
-                                    available_times.append(time_str)
-            
-            # 로깅 메시지 개선
-            if target_theme_id is not None:
+                theme_minutes[str(theme_id)] = array('H', sorted(minutes))
+                
+        except Exception as e:
+            self.logger.error(f"시간 데이터 추출 실패: {e}")
+        
+        return theme_minutes
+    
+    def extract_available_times(self, api_response, target_theme_id=None, theme_name=None, target_date=None):
+        """스냅샷 또는 API 응답에서 예약 가능한 시간 추출 (특정 테마 필터링 지원)"""
+        try:
+            if isinstance(api_response, AvailabilitySnapshot):
+                snapshot = api_response
+            else:
+                snapshot = AvailabilitySnapshot(None, {}, self.extract_minutes_by_theme(api_response))
+            
+            with self.metrics.timed('extract_available_times'):
+                available_times = snapshot.get_times(target_theme_id)
+            
+            # 조회마다 실행되므로 DEBUG 수준에서만 테마명 조회/메시지 조립
+            if target_theme_id is not None and self.logger.isEnabledFor(logging.DEBUG):
                 if theme_name is None and target_date is not None:
                     theme_name = self.get_theme_name_by_id(target_theme_id, target_date)
                 if theme_name:
-                    self.logger.info(f"테마 '{theme_name}'에서 {len(available_times)}개의 예약 가능한 시간 발견: {available_times}")
+                    self.logger.debug("테마 '%s'에서 %d개의 예약 가능한 시간 발견: %s",
+                                      theme_name, len(available_times), available_times)
             
             return available_times
             
@@ -244,163 +1841,496 @@ class ZeroWorldReservation:
             
         return theme_mapping
     
-    def make_reservation(self, date, target_time, theme_id, user_info):
-        """예약 실행"""
-        if not self.driver:
-            self.setup_driver()
+    def make_reservation(self, date, target_time, theme_id, user_info, observed_at=None):
+        """예약 실행 (http 방식은 직접 전송이 거부된 경우에만 Selenium으로 재시도) 후 API로 결과 확인
+        
+        실패 결과의 'failure'는 BOOKING_FAILURES 중 하나 (observed_at은 슬롯을 발견한 조회 시각)
+        """
+        with self.metrics.timed('make_reservation') as call:
+            result = self.precheck_slot(date, target_time, theme_id, user_info, observed_at)
+            if result is None:
+                result = self.submit_reservation(date, target_time, theme_id, user_info)
+            call['error'] = not result["success"]
+        return result
+    
+    def precheck_slot(self, date, target_time, theme_id, user_info, observed_at=None):
+        """발견한 지 precheck_age가 지난 슬롯은 전송 직전 다시 확인 (마감됐으면 실패 결과, 아니면 None)"""
+        if observed_at is None or time.time() - observed_at <= self.booking_retry['precheck_age']:
+            return None
+        
+        with self.metrics.timed('booking_precheck'):
+            is_open = self.is_slot_open(date, target_time, theme_id, user_info)
+        if is_open is False:
+            return {"success": False, "failure": "slot_taken",
+                    "message": f"슬롯이 이미 마감되었습니다: {date.strftime('%Y-%m-%d')} {target_time}"}
+        return None
+    
+    def submit_reservation(self, date, target_time, theme_id, user_info):
+        """booking_mode에 따라 예약 전송 후 결과 확인 (거부된 경우 슬롯이 마감됐으면 Selenium으로 재시도하지 않고 확인 요청)"""
+        if self.booking_mode == 'http':
+            result = self.retry_submit(self.make_reservation_http, date, target_time, theme_id, user_info)
+            if result["success"] or not result.get("rejected"):
+                return self.confirm_booking(result, date, target_time, theme_id, user_info)
+            if result.get("failure") == 'slot_taken':
+                return result
+            if self.is_slot_open(date, target_time, theme_id, user_info) is False:
+                # 거부 응답을 잘못 해석했을 수도 있으므로 마감을 예약 실패로 단정하지 않음
+                return self.uncertain_result(dict(result, message=f"요청은 거부됐으나 슬롯이 마감됨 ({result['message']})"),
+                                             date, target_time)
+            self.logger.warning(f"직접 예약 요청 거부됨, Selenium으로 재시도: {result['message']}")
+        
+        with self.driver_lock:
+            result = self.retry_submit(self.make_reservation_selenium, date, target_time, theme_id, user_info)
+        return self.confirm_booking(result, date, target_time, theme_id, user_info)
+    
+    def retry_submit(self, submit, date, target_time, theme_id, user_info):
+        """예약 전송 (처리되지 않은 것이 확실한 실패만 같은 슬롯 재시도)
+        
+        같은 슬롯은 한 번만 예약되므로 재시도해도 중복 예약이 생기지 않지만, 결과를 알 수 없던 요청은 늦게 처리될 수 있어
+        재시도가 끝내 실패했을 때 슬롯이 마감됐으면(또는 확인할 수 없으면) 예약됐을 수 있는 것으로 처리 (다른 슬롯 추가 예약 방지)
+        """
+        attempts = self.booking_retry['attempts']
+        maybe_delivered = False
+        for attempt in range(attempts + 1):
+            result = submit(date, target_time, theme_id, user_info)
+            if result.get("failure") == 'unknown':
+                maybe_delivered = True
+                result = self.resolve_unknown(result, date, target_time, theme_id, user_info)
+            if result["success"] or result.get("failure") not in RETRYABLE_FAILURES or attempt == attempts:
+                break
+            self.logger.warning(f"예약 재시도 ({result['failure']}, {attempt + 1}/{attempts}): {result['message']}")
+        
+        if maybe_delivered and not result["success"]:
+            # 마지막 거부 뒤에도 슬롯이 열려 있으면 앞선 요청은 처리되지 않은 것
+            if self.verify_booking(date, target_time, theme_id, user_info) is not False:
+                return self.uncertain_result(result, date, target_time)
+        return result
+    
+    def resolve_unknown(self, result, date, target_time, theme_id, user_info):
+        """전송 결과를 알 수 없는 경우 슬롯 재조회로 판정 (열려 있으면 재시도 가능, 마감/확인 불가면 예약됐을 수 있음)"""
+        verified = self.verify_booking(date, target_time, theme_id, user_info)
+        if verified is False:
+            return dict(result, failure='network', rejected=True)
+        return self.uncertain_result(result, date, target_time)
+    
+    def uncertain_result(self, result, date, target_time):
+        """예약됐을 수 있는 결과 (다른 슬롯을 추가로 예약하지 않도록 성공으로 처리하고 확인을 요청)"""
+        self.logger.warning(f"예약 결과 확인 불가: {date.strftime('%Y-%m-%d')} {target_time} - {result['message']}")
+        return dict(result, success=True, verified=False, uncertain=True,
+                    message=f"예약 결과를 확인할 수 없습니다 ({result['message']}) - 예약 내역을 확인하세요")
+    
+    def is_slot_open(self, date, target_time, theme_id, user_info):
+        """/reservation/theme 재조회로 슬롯이 열려 있는지 확인 (조회 실패 시 None)"""
+        snapshot = self.fetch_availability_snapshot(date, user_info)
+        if snapshot is None:
+            return None
+        return parse_minutes(target_time) in snapshot.get_minutes(theme_id)
+    
+    def confirm_booking(self, result, date, target_time, theme_id, user_info):
+        """전송에 성공한 예약을 슬롯 상태로 확인 (슬롯이 여전히 열려 있으면 실패로 변경)
+        
+        슬롯 마감은 다른 사람의 예약일 수도 있으므로 응답/페이지에서 완료를 확인한 경우(confirmed)에만 예약 성공으로 확정
+        """
+        if not result["success"] or result.get("uncertain"):
+            return result
+        
+        with self.metrics.timed('booking_verify') as call:
+            verified = self.verify_booking(date, target_time, theme_id, user_info)
+            call['error'] = verified is None
+        if verified is None:
+            # 확인 조회 자체가 실패한 경우 중복 예약을 막기 위해 전송 결과를 그대로 사용
+            self.logger.warning(f"예약 확인 조회 실패, 전송 결과 사용: {date.strftime('%Y-%m-%d')} {target_time}")
+            if not result.get("confirmed"):
+                return self.uncertain_result(result, date, target_time)
+            return dict(result, verified=False)
+        if verified:
+            if not result.get("confirmed"):
+                return self.uncertain_result(dict(result, message="슬롯은 마감되었으나 예약 완료 응답을 확인하지 못함"),
+                                             date, target_time)
+            return dict(result, verified=True)
+        
+        self.logger.warning(f"예약 확인 실패 - 슬롯이 아직 열려 있음: {date.strftime('%Y-%m-%d')} {target_time}")
+        return dict(result, success=False, verified=False, false_positive=True, failure='validation',
+                    message="예약이 반영되지 않았습니다 (슬롯이 아직 열려 있음)")
+    
+    def verify_booking(self, date, target_time, theme_id, user_info):
+        """/reservation/theme 재조회로 슬롯이 예약(reservation: true) 상태가 되었는지 확인 (조회 실패 시 None)"""
+        checked = False
+        for attempt in range(self.booking_verify['attempts']):
+            if attempt:
+                time.sleep(self.booking_verify['interval'])
+            
+            is_open = self.is_slot_open(date, target_time, theme_id, user_info)
+            if is_open is None:
+                continue
+            checked = True
+            if not is_open:
+                return True
+        
+        return False if checked else None
+    
+    def make_reservation_http(self, date, target_time, theme_id, user_info):
+        """브라우저 없이 예약 폼을 세션으로 직접 전송"""
+        csrf_token = self.get_csrf_token()
+        if not csrf_token:
+            return {"success": False, "rejected": True, "failure": "network", "message": "CSRF 토큰을 획득할 수 없습니다"}
+        
+        self.sync_session_cookies()
+        
+        # 예약 페이지 폼과 동일한 필드 구성
+        data = {
+            '_token': csrf_token,
+            'reservationDate': date.strftime('%Y-%m-%d'),
+            'themePK': str(theme_id),
+            'reservationTime': f"{target_time}:00",
+            'name': user_info['name'],
+            'phone': user_info['phone'],
+            'people': str(user_info['people_count']),
+            'policy': 'on',
+            'paymentType': '1'
+        }
         
         try:
-            self.logger.info("예약 페이지 로드 중...")
-            self.driver.get(self.reservation_url)
-            time.sleep(3)
+            self.logger.info(f"예약 요청 직접 전송: {data['reservationDate']} {target_time} (테마: {theme_id})")
+            submitted_at = time.time()
+            with self.metrics.timed('booking_submit') as call:
+                response = self.session.post(self.booking_url, headers=self.build_request_headers(csrf_token),
+                                             data=data, timeout=self.timeout)
+                call['error'] = response.status_code >= 400
+        except requests.exceptions.ConnectionError as e:
+            # 요청이 서버에 도달하지 못한 경우에만 재시도 허용
+            return {"success": False, "rejected": True, "failure": "network", "message": f"예약 요청 전송 실패: {e}"}
+        except Exception as e:
+            # 서버 처리 여부를 알 수 없으므로 슬롯 재조회로 판정하기 전에는 재시도하지 않음
+            self.logger.error(f"예약 요청 결과 확인 실패: {e}")
+            return {"success": False, "failure": "unknown", "message": f"예약 요청 결과 확인 실패: {e}",
+                    "submitted_at": submitted_at}
+        
+        return dict(self.interpret_booking_response(response), submitted_at=submitted_at)
+    
+    def interpret_booking_response(self, response):
+        """직접 전송한 예약 요청의 응답 해석"""
+        # 419(토큰 만료), 422(검증 실패) 등은 서버가 예약을 거부한 것
+        if response.status_code in SESSION_EXPIRED_STATUSES:
+            self.session_manager.invalidate()
+            return {"success": False, "rejected": True, "failure": "token_expired",
+                    "message": f"예약 요청 거부 (세션 만료): {response.status_code}"}
+        if response.status_code >= 500:
+            # 서버 오류는 처리 도중 실패했을 수 있으므로 결과를 알 수 없는 것으로 취급
+            return {"success": False, "failure": "unknown", "message": f"예약 요청 서버 오류: {response.status_code}"}
+        
+        try:
+            result = response.json()
+        except ValueError:
+            result = None
+        message = (result.get('message') or result.get('errors')) if isinstance(result, dict) else None
+        
+        if response.status_code >= 400:
+            # 마감 문구가 있으면 슬롯 마감, 아니면 입력값 검증 실패
+            failure = 'slot_taken' if classify_booking_message(message) == 'slot_taken' else 'validation'
+            return {"success": False, "rejected": True, "failure": failure,
+                    "message": f"예약 요청 거부: {response.status_code}" + (f" ({message})" if message else "")}
+        
+        if isinstance(result, dict):
+            if result.get('errors') or result.get('success') is False or result.get('result') in (False, 'fail', 'error'):
+                failure = 'slot_taken' if classify_booking_message(message) == 'slot_taken' else 'validation'
+                return {"success": False, "rejected": True, "failure": failure,
+                        "message": f"예약 요청 거부: {message or '사유 없음'}"}
+            # 완료를 명시한 응답만 확정 (그 외에는 슬롯 재조회 결과와 함께 판단)
+            confirmed = (result.get('success') is True or result.get('result') in (True, 'success')
+                         or classify_booking_message(message) == 'success')
+            return {"success": True, "confirmed": confirmed,
+                    "message": message or ("예약이 완료되었습니다" if confirmed else "예약 요청이 접수되었습니다")}
+        
+        page = classify_booking_message(response.text)
+        # 검증 실패 시 Laravel은 예약 페이지로 되돌려 보냄 (실제 리다이렉트만 거부로 판단, 그 외 페이지는 슬롯 재조회로 확인)
+        if response.history and response.url.rstrip('/') == self.reservation_url and page != 'success':
+            if page == 'slot_taken':
+                return {"success": False, "rejected": True, "failure": "slot_taken",
+                        "message": "슬롯이 이미 마감되었습니다 (예약 페이지로 되돌아옴)"}
+            return {"success": False, "rejected": True, "failure": "validation", "message": "예약 페이지로 되돌아옴"}
+        
+        return {"success": True, "confirmed": page == 'success',
+                "message": "예약이 완료되었습니다" if page == 'success' else "예약 요청이 접수되었습니다"}
+    
+    def load_reservation_page(self):
+        """예약 페이지 로드 (datepicker 렌더링까지)"""
+        self.logger.info("예약 페이지 로드 중...")
+        self.driver.get(self.reservation_url)
+        self.wait_for('page_load', EC.presence_of_element_located((By.CSS_SELECTOR, '.datepicker--cell')))
+    
+    def select_date(self, date, wait_css='input[name="themePK"]'):
+        """datepicker에서 날짜 선택 후 테마 목록이 다시 그려질 때까지 대기"""
+        # 이전에 그려진 테마 목록이 교체되는 것까지 확인
+        previous = self.driver.find_elements(By.CSS_SELECTOR, 'input[name="themePK"]')
+        
+        target_day = date.day
+        date_elements = self.driver.find_elements(By.CSS_SELECTOR, '.datepicker--cell')
+        
+        for elem in date_elements:
+            if elem.text.strip() == str(target_day) and elem.is_enabled():
+                elem.click()
+                self.logger.info(f"날짜 선택: {date.strftime('%Y-%m-%d')}")
+                break
+        else:
+            date_str = date.strftime('%Y-%m-%d')
+            date_input = self.driver.find_element(By.NAME, 'reservationDate')
+            self.driver.execute_script(f"arguments[0].value = '{date_str}';", date_input)
+        
+        if previous:
+            try:
+                self.wait_for('date_select', EC.staleness_of(previous[0]))
+            except TimeoutException:
+                pass
+        self.wait_for('date_select', EC.presence_of_element_located((By.CSS_SELECTOR, wait_css)))
+    
+    def fill_user_info(self, user_info):
+        """2단계 사용자 정보 입력"""
+        self.logger.info("사용자 정보 입력 중...")
+        
+        # 이름 입력
+        name_field = self.driver.find_element(By.NAME, 'name')
+        name_field.clear()
+        name_field.send_keys(user_info['name'])
+        
+        # 전화번호 입력
+        phone_field = self.driver.find_element(By.NAME, 'phone')
+        phone_field.clear()
+        phone_field.send_keys(user_info['phone'])
+        
+        # 인원수 선택
+        people_select = self.driver.find_element(By.NAME, 'people')
+        people_select.click()
+        people_option = self.driver.find_element(By.CSS_SELECTOR, f'option[value="{user_info["people_count"]}"]')
+        people_option.click()
+    
+    def prefill_user_info(self, user_info):
+        """아직 숨겨진 2단계 입력 폼에 사용자 정보를 미리 채움"""
+        self.driver.execute_script("""
+            var form = {name: arguments[0], phone: arguments[1], people: arguments[2]};
+            for (var key in form) {
+                var field = document.querySelector('[name="' + key + '"]');
+                if (field) {
+                    field.value = form[key];
+                    field.dispatchEvent(new Event('input', {bubbles: true}));
+                    field.dispatchEvent(new Event('change', {bubbles: true}));
+                }
+            }
+            var policy = document.querySelector('input[name="policy"]');
+            if (policy) { policy.checked = true; }
+        """, user_info['name'], user_info['phone'], str(user_info['people_count']))
+    
+    def prepare_standby(self, date, user_info):
+        """브라우저를 미리 띄워 예약 화면을 날짜 선택, 사용자 정보 입력 상태로 대기"""
+        try:
+            with self.driver_lock:
+                self.checkout_driver()
+                self.load_reservation_page()
+                self.select_date(date)
+                self.prefill_user_info(user_info)
+            
+            self.standby_date = date.strftime('%Y-%m-%d')
+            self.standby_user_info = user_info
+            self.standby_prepared_at = time.time()
+            self.standby_failures = 0
+            self.standby_retry_at = None
+            self.logger.info(f"대기 예약 화면 준비 완료: {self.standby_date}")
+            return True
+            
+        except Exception as e:
+            self.clear_standby()
+            delay = min(STANDBY_RETRY_DELAY * 2 ** self.standby_failures, STANDBY_RETRY_MAX_DELAY)
+            self.standby_failures += 1
+            self.standby_retry_at = time.time() + delay
+            self.logger.error(f"대기 예약 화면 준비 실패 ({self.standby_failures}회, {delay}초 후 재시도): {e}")
+            return False
+    
+    def ensure_standby(self, date, user_info):
+        """대기 예약 화면이 없거나 오래된 경우 다시 준비 (준비 실패 후에는 재시도 시각까지 건너뜀)"""
+        if self.standby_date is not None and time.time() - self.standby_prepared_at < STANDBY_MAX_AGE:
+            return True
+        if self.standby_retry_at is not None and time.time() < self.standby_retry_at:
+            return False
+        return self.prepare_standby(date, user_info)
+    
+    def clear_standby(self):
+        """대기 예약 화면 상태 초기화 (예약 시도 후에는 페이지를 재사용하지 않음)"""
+        self.standby_date = None
+        self.standby_user_info = None
+        self.standby_prepared_at = None
+    
+    def make_reservation_selenium(self, date, target_time, theme_id, user_info):
+        """브라우저로 예약 페이지를 조작해 예약 실행"""
+        try:
+            self.checkout_driver()
+        except Exception as e:
+            self.logger.error(f"드라이버 실행 실패: {e}")
+            return {"success": False, "failure": "network", "message": f"드라이버 실행 실패: {e}"}
+        
+        timer = StepTimer()
+        driver_failed = False
+        theme_css = f'input[name="themePK"][value="{theme_id}"]'
+        time_with_seconds = f"{target_time}:00"
+        time_css = f'input[name="reservationTime"][value="{time_with_seconds}"]'
+        
+        # 대기 예약 화면이 준비되어 있으면 페이지 로드를 생략
+        standby = self.standby_date is not None and self.standby_user_info == user_info
+        self.clear_standby()
+        
+        try:
+            if standby:
+                self.logger.info("대기 중인 예약 화면 사용")
+            else:
+                with timer.step('page_load'):
+                    self.load_reservation_page()
             
             # 1단계: 테마, 시간, 날짜 선택
             self.logger.info("테마, 시간, 날짜 선택 중...")
             
-            # 날짜 선택
-            target_day = date.day
-            date_elements = self.driver.find_elements(By.CSS_SELECTOR, '.datepicker--cell')
-            
-            for elem in date_elements:
-                if elem.text.strip() == str(target_day) and elem.is_enabled():
-                    elem.click()
-                    self.logger.info(f"날짜 선택: {date.strftime('%Y-%m-%d')}")
-                    time.sleep(1)
-                    break
-            else:
-                date_str = date.strftime('%Y-%m-%d')
-                date_input = self.driver.find_element(By.NAME, 'reservationDate')
-                self.driver.execute_script(f"arguments[0].value = '{date_str}';", date_input)
+            # 날짜 선택 (대기 화면도 최신 시간 목록을 받기 위해 다시 선택)
+            with timer.step('date_select'):
+                self.select_date(date, theme_css)
             
-            # 테마 선택
-            theme_selector = self.driver.find_element(By.CSS_SELECTOR, f'input[name="themePK"][value="{theme_id}"]')
-            if not theme_selector.is_selected():
-                self.driver.execute_script("arguments[0].click();", theme_selector)
-                self.logger.info(f"테마 선택: {theme_id}")
-                time.sleep(1)
+            # 테마 선택 (라디오 체크 + 시간 목록 표시)
+            with timer.step('theme_select'):
+                theme_selector = self.driver.find_element(By.CSS_SELECTOR, theme_css)
+                if not theme_selector.is_selected():
+                    self.driver.execute_script("arguments[0].click();", theme_selector)
+                    self.logger.info(f"테마 선택: {theme_id}")
+                    self.wait_for('theme_select', EC.element_to_be_selected(theme_selector))
+                
+                try:
+                    self.wait_for('theme_select', EC.presence_of_element_located((By.CSS_SELECTOR, time_css)))
+                except TimeoutException:
+                    self.logger.error(f"시간 {time_with_seconds}을 찾을 수 없습니다")
+                    return {"success": False, "failure": "slot_taken", "message": f"시간 {target_time}을 찾을 수 없습니다",
+                            "timings": timer.steps}
             
             # 시간 선택
-            time_with_seconds = f"{target_time}:00"
-            try:
-                time_selector = self.driver.find_element(By.CSS_SELECTOR, f'input[name="reservationTime"][value="{time_with_seconds}"]')
+            with timer.step('time_select'):
+                time_selector = self.driver.find_element(By.CSS_SELECTOR, time_css)
                 if not time_selector.is_selected():
                     self.driver.execute_script("arguments[0].click();", time_selector)
                     self.logger.info(f"시간 선택: {time_with_seconds}")
-                    time.sleep(1)
-            except:
-                self.logger.error(f"시간 {time_with_seconds}을 찾을 수 없습니다")
-                return {"success": False, "message": f"시간 {target_time}을 찾을 수 없습니다"}
-            
-            # NEXT 버튼 클릭
-            next_btn = self.driver.find_element(By.ID, 'nextBtn')
-            next_btn.click()
-            self.logger.info("다음 단계로 이동")
-            time.sleep(2)
-            
-            # 2단계: 사용자 정보 입력
-            self.logger.info("사용자 정보 입력 중...")
-            
-            WebDriverWait(self.driver, 10).until(
-                EC.visibility_of_element_located((By.NAME, "name"))
-            )
-            
-            # 이름 입력
-            name_field = self.driver.find_element(By.NAME, 'name')
-            name_field.clear()
-            name_field.send_keys(user_info['name'])
+                    self.wait_for('time_select', EC.element_to_be_selected(time_selector))
             
-            # 전화번호 입력
-            phone_field = self.driver.find_element(By.NAME, 'phone')
-            phone_field.clear()
-            phone_field.send_keys(user_info['phone'])
+            # NEXT 버튼 클릭 (사용자 정보 입력 화면 전환까지)
+            with timer.step('next_step'):
+                self.wait_for('next_step', EC.element_to_be_clickable((By.ID, 'nextBtn'))).click()
+                self.logger.info("다음 단계로 이동")
+                self.wait_for('next_step', EC.visibility_of_element_located((By.NAME, "name")))
             
-            # 인원수 선택
-            people_select = self.driver.find_element(By.NAME, 'people')
-            people_select.click()
-            people_option = self.driver.find_element(By.CSS_SELECTOR, f'option[value="{user_info["people_count"]}"]')
-            people_option.click()
+            # 2단계: 사용자 정보 입력 (대기 화면에서 미리 채운 경우 생략)
+            with timer.step('user_info'):
+                name_field = self.driver.find_element(By.NAME, 'name')
+                phone_field = self.driver.find_element(By.NAME, 'phone')
+                prefilled = (standby
+                             and name_field.get_attribute('value') == user_info['name']
+                             and phone_field.get_attribute('value') == user_info['phone'])
+                if not prefilled:
+                    self.fill_user_info(user_info)
             
             # 정책 동의 체크박스
-            try:
-                policy_checkbox = self.driver.find_element(By.NAME, 'policy')
-                parent_label = policy_checkbox.find_element(By.XPATH, '..')
-                parent_label.click()
-                time.sleep(1)
-                
-                if not policy_checkbox.is_selected():
-                    self.driver.execute_script("arguments[0].checked = true;", policy_checkbox)
-                    time.sleep(1)
-                
-            except Exception as e:
-                self.logger.error(f"정책 동의 체크박스 처리 실패: {e}")
-                return {"success": False, "message": "정책 동의 체크박스를 찾을 수 없습니다"}
-            
-            time.sleep(1)
-            
-            # 예약하기 버튼 클릭
-            reservation_btn = self.driver.find_element(By.ID, 'reservationBtn')
-            reservation_btn.click()
-            self.logger.info("예약 요청 전송")
-            
-            # Alert 처리
-            try:
-                WebDriverWait(self.driver, 3).until(EC.alert_is_present())
-                alert = self.driver.switch_to.alert
-                alert_text = alert.text
-                self.logger.warning(f"Alert 발생: {alert_text}")
-                alert.accept()
-                
-                if "개인정보" in alert_text or "동의" in alert_text:
-                    return {"success": False, "message": f"정책 동의 필요: {alert_text}"}
-            except:
-                pass
-            
-            # 결과 확인
-            time.sleep(3)
+            with timer.step('policy'):
+                try:
+                    policy_checkbox = self.driver.find_element(By.NAME, 'policy')
+                    if not policy_checkbox.is_selected():
+                        parent_label = policy_checkbox.find_element(By.XPATH, '..')
+                        parent_label.click()
+                        
+                        try:
+                            self.wait_for('policy', EC.element_to_be_selected(policy_checkbox))
+                        except TimeoutException:
+                            self.driver.execute_script("arguments[0].checked = true;", policy_checkbox)
+                    
+                except Exception as e:
+                    self.logger.error(f"정책 동의 체크박스 처리 실패: {e}")
+                    return {"success": False, "failure": "validation", "message": "정책 동의 체크박스를 찾을 수 없습니다",
+                            "timings": timer.steps}
             
-            try:
-                current_url = self.driver.current_url
-                page_source = self.driver.page_source
+            # 예약하기 버튼 클릭 (alert 또는 결과 페이지까지)
+            with timer.step('submit'):
+                form_url = self.driver.current_url
+                reservation_btn = self.driver.find_element(By.ID, 'reservationBtn')
+                submitted_at = time.time()
+                reservation_btn.click()
+                self.logger.info("예약 요청 전송")
                 
-                # 성공 패턴 확인
-                success_patterns = [
-                    ("예약" in page_source and "완료" in page_source),
-                    ("예약" in page_source and "성공" in page_source),
-                    ("완료" in page_source),
-                    ("성공" in page_source),
-                    ("감사" in page_source),
-                    ("success" in current_url.lower()),
-                    ("complete" in current_url.lower()),
-                ]
+                def submission_settled(driver):
+                    try:
+                        return driver.switch_to.alert
+                    except NoAlertPresentException:
+                        pass
+                    if driver.current_url != form_url:
+                        return True
+                    buttons = driver.find_elements(By.ID, 'reservationBtn')
+                    return not buttons or not buttons[0].is_displayed()
                 
-                for pattern in success_patterns:
-                    if pattern:
-                        return {"success": True, "message": "예약이 완료되었습니다"}
-                
-                # 예약하기 버튼이 사라졌는지 확인
                 try:
-                    reservation_btn = self.driver.find_element(By.ID, 'reservationBtn')
-                    if not reservation_btn.is_displayed():
-                        return {"success": True, "message": "예약이 완료되었습니다"}
-                except:
-                    return {"success": True, "message": "예약이 완료되었습니다"}
+                    settled = self.wait_for('submit', submission_settled)
+                except TimeoutException:
+                    settled = None
                 
-                return {"success": True, "message": "예약이 정상적으로 처리된 것으로 추정됩니다"}
+                if settled is None:
+                    # 전송 후 화면 변화가 없으면 서버 처리 여부를 알 수 없음 (슬롯 재조회로 판정)
+                    self.logger.error("예약 요청 후 결과 화면 대기 시간 초과")
+                    return {"success": False, "failure": "unknown", "message": "예약 결과 대기 시간 초과",
+                            "timings": timer.steps, "submitted_at": submitted_at}
                 
-            except Exception as e:
-                return {"success": False, "message": f"결과 확인 실패: {str(e)}"}
-                    
+                if settled is True:
+                    outcome = classify_booking_message(self.driver.find_element(By.TAG_NAME, 'body').text)
+                    message = None
+                else:
+                    # Alert 처리
+                    message = settled.text
+                    self.logger.warning(f"Alert 발생: {message}")
+                    settled.accept()
+                    outcome = classify_booking_message(message)
+                    if outcome is None:
+                        reason = "정책 동의 필요" if "개인정보" in message or "동의" in message else "예약 요청 거부"
+                        return {"success": False, "failure": "validation", "message": f"{reason}: {message}",
+                                "timings": timer.steps, "submitted_at": submitted_at}
+                
+                if outcome == 'slot_taken':
+                    return {"success": False, "failure": "slot_taken",
+                            "message": "슬롯이 이미 마감되었습니다" + (f" ({message})" if message else ""),
+                            "timings": timer.steps, "submitted_at": submitted_at}
+            
+            # 완료 문구를 보지 못한 경우 make_reservation에서 /reservation/theme 재조회와 함께 판단
+            return {"success": True, "confirmed": outcome == 'success',
+                    "message": "예약이 완료되었습니다" if outcome == 'success' else "예약 요청이 접수되었습니다",
+                    "timings": timer.steps, "submitted_at": submitted_at}
+        
+        except TimeoutException:
+            driver_failed = True
+            self.logger.error(f"예약 실행 시간 초과: {timer.current} 단계 ({self.step_timeouts.get(timer.current)}초)")
+            # 예약 버튼을 누른 뒤라면 결과를 알 수 없음
+            return {"success": False, "failure": "unknown" if timer.current == 'submit' else "network",
+                    "message": f"{timer.current} 단계 시간 초과", "timings": timer.steps}
         except Exception as e:
+            driver_failed = True
             self.logger.error(f"예약 실행 실패: {e}")
-            return {"success": False, "message": str(e)}
+            return {"success": False, "failure": "unknown" if timer.current == 'submit' else "network",
+                    "message": str(e), "timings": timer.steps}
+        finally:
+            # 사용 횟수/메모리 기준 교체와 응답 없는 드라이버 정리
+            self.checkin_driver(failed=driver_failed)
+            self.logger.info(f"예약 단계별 소요 시간: {timer.report()}")
+            for name, seconds in timer.steps:
+                self.metrics.observe(f"selenium_{name}", seconds, error=name == timer.failed)
     
-    def check_and_book(self, target_date, time_range, theme_name, user_info):
-        """특정 날짜에 예약 가능한 시간이 있는지 확인하고 예약 시도"""
-        self.logger.info(f"예약 확인: {target_date.strftime('%Y-%m-%d')} {time_range['start']}-{time_range['end']} (테마: {theme_name})")
+    def check_and_book(self, target_date, time_range, theme_name, user_info, snapshot=None):
+        """특정 날짜에 예약 가능한 시간이 있는지 확인하고 예약 시도 (미리 조회한 스냅샷 사용 가능)"""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("예약 확인: %s %s (테마: %s)", target_date.strftime('%Y-%m-%d'),
+                              self.compile_time_windows(time_range).describe(), theme_name)
         
         try:
-            # 먼저 해당 날짜의 모든 테마 정보를 가져와서 매핑 업데이트
-            self.get_available_times_for_theme(target_date, None, user_info, theme_name)
+            # 해당 날짜의 예약 현황을 한 번만 조회 (테마 매핑 + 테마별 시간)
+            if snapshot is None:
+                snapshot = self.fetch_availability_snapshot(target_date, user_info)
+            if snapshot is None:
+                return {"success": False, "message": "예약 현황 조회 실패"}
             
             # 테마명으로 테마 ID 찾기
             try:
@@ -409,27 +2339,10 @@ class ZeroWorldReservation:
                 return {"success": False, "message": str(e)}
             
             # 특정 테마의 예약 가능 시간 확인
-            available_times = self.get_available_times_for_theme(target_date, theme_id, user_info, theme_name)
+            available_times = self.extract_available_times(snapshot, theme_id, theme_name, target_date)
             
             if available_times:
-                # 시간 구간 내에서 예약 가능한 시간 찾기
-                available_in_range = self.find_available_time_in_range(available_times, time_range)
-                
-                if available_in_range:
-                    target_time = available_in_range[0]
-                    self.logger.info(f"예약 가능한 시간 발견! 예약 시도: {target_time}")
-                    
-                    result = self.make_reservation(target_date, target_time, theme_id, user_info)
-                    
-                    if result["success"]:
-                        self.logger.info(f"예약 성공: {result['message']} (시간: {target_time})")
-                        return {"success": True, "message": result['message'], "time": target_time}
-                    else:
-                        self.logger.error(f"예약 실패: {result['message']}")
-                        return {"success": False, "message": result['message'], "time": target_time}
-                else:
-                    self.logger.info(f"시간 구간 {time_range['start']}-{time_range['end']} 내 예약 가능한 시간 없음")
-                    return {"success": False, "message": f"시간 구간 {time_range['start']}-{time_range['end']} 내 예약 가능한 시간 없음"}
+                return self.book_in_range(target_date, available_times, time_range, theme_id, user_info)
             else:
                 return {"success": False, "message": f"테마 '{theme_name}'에서 예약 가능한 시간 없음"}
             
@@ -437,15 +2350,43 @@ class ZeroWorldReservation:
             self.logger.error(f"예약 확인 오류: {e}")
             return {"success": False, "message": f"예약 확인 오류: {str(e)}"}
     
+    def book_in_range(self, target_date, available_times, time_range, theme_id, user_info):
+        """예약 가능한 시간 중 시간 구간 내 가장 빠른 시간으로 예약 시도"""
+        # 시간 구간 내에서 예약 가능한 시간 찾기
+        available_in_range = self.find_available_time_in_range(available_times, time_range)
+        
+        if available_in_range:
+            target_time = available_in_range[0]
+            self.logger.info(f"예약 가능한 시간 발견! 예약 시도: {target_time}")
+            
+            result = self.make_reservation(target_date, target_time, theme_id, user_info)
+            
+            if result["success"]:
+                self.logger.info(f"예약 성공: {result['message']} (시간: {target_time})")
+                return {"success": True, "message": result['message'], "time": target_time}
+            else:
+                self.logger.error(f"예약 실패: {result['message']}")
+                return {"success": False, "message": result['message'], "time": target_time}
+        else:
+            windows = self.compile_time_windows(time_range).describe()
+            self.logger.debug("시간 구간 %s 내 예약 가능한 시간 없음", windows)
+            return {"success": False, "message": f"시간 구간 {windows} 내 예약 가능한 시간 없음"}
+    
     def get_theme_id_by_name(self, theme_name, target_date):
         """특정 날짜의 테마명으로 테마 ID 찾기"""
         date_str = target_date.strftime('%Y-%m-%d')
         
-        if date_str in self.date_theme_mappings:
-            theme_mapping = self.date_theme_mappings[date_str]
+        # 최신 스냅샷의 매핑을 우선 사용
+        snapshot = self.date_snapshots.get(date_str)
+        if snapshot is not None and snapshot.theme_mapping:
+            theme_mapping = snapshot.theme_mapping
+        else:
+            theme_mapping = self.theme_catalog.get(self.store, date_str)
+        
+        if theme_mapping is not None:
             if theme_name in theme_mapping:
                 theme_id = theme_mapping[theme_name]
-                self.logger.info(f"테마명 변환: '{theme_name}' -> ID '{theme_id}' ({date_str})")
+                self.logger.debug("테마명 변환: '%s' -> ID '%s' (%s)", theme_name, theme_id, date_str)
                 return theme_id
             
             available_themes = list(theme_mapping.keys())
@@ -457,145 +2398,739 @@ class ZeroWorldReservation:
         """특정 날짜의 테마 ID로 테마명 찾기"""
         date_str = target_date.strftime('%Y-%m-%d')
         
-        if date_str in self.date_theme_mappings:
-            theme_mapping = self.date_theme_mappings[date_str]
-            for theme_name, tid in theme_mapping.items():
-                if str(tid) == str(theme_id):
-                    return theme_name
-        
-        # 모든 날짜에서 찾기 (fallback)
-        for date_mapping in self.date_theme_mappings.values():
-            for theme_name, tid in date_mapping.items():
-                if str(tid) == str(theme_id):
-                    return theme_name
+        # 해당 날짜 우선, 없으면 모든 날짜에서 찾기 (역색인)
+        theme_name = self.theme_catalog.get_theme_name(self.store, theme_id, date_str)
+        if theme_name:
+            return theme_name
         
         return f"테마ID:{theme_id}"  # 테마명을 찾지 못한 경우 ID 표시
     
     def list_available_themes(self):
         """모든 날짜의 사용 가능한 테마 목록 반환"""
-        all_themes = set()
-        for date_mapping in self.date_theme_mappings.values():
-            all_themes.update(date_mapping.keys())
-        return list(all_themes)
+        return list(self.theme_catalog.theme_names(self.store))
     
-    def find_available_time_in_range(self, available_times, time_range):
-        """시간 구간 내에서 예약 가능한 시간 찾기"""
-        start_time = datetime.strptime(time_range['start'], '%H:%M').time()
-        end_time = datetime.strptime(time_range['end'], '%H:%M').time()
+    def has_theme_info(self):
+        """테마 정보가 로드되었는지 여부 (디스크 캐시 포함)"""
+        return self.theme_catalog.has_store(self.store)
+    
+    def compile_time_windows(self, time_range):
+        """시간 구간 설정(dict, dict 목록 또는 TimeWindows)을 한 번만 변환해 재사용"""
+        if isinstance(time_range, TimeWindows):
+            return time_range
         
-        available_in_range = []
+        ranges = [time_range] if isinstance(time_range, dict) else time_range
+        key = tuple((r['start'], r['end']) for r in ranges)
+        windows = self.time_windows_cache.get(key)
+        if windows is None:
+            windows = TimeWindows(ranges)
+            self.time_windows_cache[key] = windows
+        return windows
+    
+    def find_available_time_in_range(self, available_times, time_range):
+        """시간 구간(여러 개 가능) 내에서 예약 가능한 시간 찾기"""
+        windows = self.compile_time_windows(time_range)
         
+        minutes = []
         for time_str in available_times:
             try:
-                if time_str.count(':') == 2:
-                    time_str = time_str.rsplit(':', 1)[0]
-                
-                time_obj = datetime.strptime(time_str, '%H:%M').time()
-                
-                if start_time <= time_obj <= end_time:
-                    available_in_range.append(time_str)
-                    
-            except ValueError:
+                minutes.append(parse_minutes(time_str))
+            except (ValueError, IndexError):
                 continue
         
-        available_in_range.sort()
-        self.logger.info(f"시간 구간 {time_range['start']}-{time_range['end']} 내 예약 가능한 시간: {available_in_range}")
+        available_in_range = [format_minutes(m) for m in windows.filter(minutes)]
+        self.logger.debug("시간 구간 %s 내 예약 가능한 시간: %s", windows, available_in_range)
         return available_in_range
     
     def cleanup(self):
         """리소스 정리"""
+        self.session_manager.stop()
         if self.driver:
             self.driver.quit()
+            self.driver = None
+        if self.driver_pool:
+            self.driver_pool.shutdown()
 
 
-def main():
-    """메인 실행 함수"""
-    config = RESERVATION_CONFIG
+class WatchJob:
+    """감시 작업 하나 (지점, 테마, 날짜 목록, 시간 구간, 우선순위)"""
+    def __init__(self, store, theme, target_dates, time_range, priority=0, user_info=None, date_time_ranges=None,
+                 ranked_windows=None, name=None):
+        self.store = store
+        self.theme = theme
+        # 제어 인터페이스와 설정 재적용에서 작업을 구분하는 이름
+        self.name = name or f"{store}:{theme}"
+        self.target_dates = target_dates
+        self.time_range = time_range
+        self.priority = priority
+        self.user_info = user_info
+        
+        # 시간 구간은 설정 로드 시 한 번만 분 단위 마스크로 변환 (날짜별 구간 지정 가능)
+        self.time_windows = TimeWindows(time_range)
+        self.date_time_windows = {
+            date_str: TimeWindows(ranges) for date_str, ranges in (date_time_ranges or {}).items()
+        }
+        # 선호 순서대로 나열한 요일별 시간 구간 [(요일 집합, TimeWindows)]
+        self.ranked_windows = [
+            (parse_days(w.get('days', 'all')), TimeWindows(w))
+            for w in (ranked_windows or [])
+        ]
+        
+        # 날짜별 분 단위 선호 순위 (255 = 구간 밖) - 슬롯마다 상수 시간 조회
+        self.date_ranks = {}
+        self.rank_masks = {}
+        for date_rank, target_date in enumerate(target_dates):
+            date_str = target_date.strftime('%Y-%m-%d')
+            self.date_ranks.setdefault(date_str, date_rank)
+            self.rank_masks[date_str] = self.build_rank_mask(target_date)
+    
+    def build_rank_mask(self, target_date):
+        """날짜에 적용되는 시간 구간으로 분 단위 선호 순위 배열 생성 (0이 가장 선호)"""
+        date_str = target_date.strftime('%Y-%m-%d')
+        if date_str in self.date_time_windows:
+            windows = [self.date_time_windows[date_str]]
+        elif self.ranked_windows:
+            windows = [w for days, w in self.ranked_windows if target_date.weekday() in days]
+        else:
+            windows = [self.time_windows]
+        
+        mask = bytearray(b'\xff' * (24 * 60))
+        # 선호도가 낮은 구간부터 채워 겹치는 시간은 더 선호하는 순위로 덮어씀
+        for rank in reversed(range(len(windows))):
+            window_mask = windows[rank].mask
+            for minutes in range(24 * 60):
+                if window_mask[minutes]:
+                    mask[minutes] = min(rank, 254)
+        return mask
+    
+    def slot_rank(self, date_str, minutes):
+        """슬롯의 시간 구간 선호 순위 (구간 밖이면 None)"""
+        rank = self.rank_masks[date_str][minutes]
+        return None if rank == 255 else rank
     
-    # 여러 날짜 지원
-    target_dates = []
-    if 'target_dates' in config:
-        for date_str in config['target_dates']:
-            target_dates.append(datetime.strptime(date_str, '%Y-%m-%d'))
-    elif 'target_date' in config:
-        target_dates.append(datetime.strptime(config['target_date'], '%Y-%m-%d'))
+    def windows_for(self, date_str):
+        """해당 날짜에 적용할 시간 구간"""
+        return self.date_time_windows.get(date_str, self.time_windows)
+    
+    def describe(self):
+        return f"{STORE_CONFIGS[self.store]['name']} / {self.theme}"
+
+
+def load_watch_jobs(config, store_configs=None):
+    """RESERVATION_CONFIG에서 감시 작업 목록 생성 (store_configs를 주지 않으면 STORE_CONFIGS 기준으로 지점 확인)"""
+    if store_configs is None:
+        store_configs = STORE_CONFIGS
+    if 'jobs' in config:
+        job_configs = config['jobs']
+        if not job_configs:
+            raise ValueError("jobs에 감시 작업이 하나 이상 필요합니다")
     else:
-        raise ValueError("target_dates 또는 target_date 설정이 필요합니다")
+        job_configs = [config]
+    
+    jobs = []
+    names = set()
+    for index, job_config in enumerate(job_configs):
+        # 여러 날짜 지원
+        target_dates = []
+        if 'target_dates' in job_config:
+            for date_str in job_config['target_dates']:
+                target_dates.append(datetime.strptime(date_str, '%Y-%m-%d'))
+        elif 'target_date' in job_config:
+            target_dates.append(datetime.strptime(job_config['target_date'], '%Y-%m-%d'))
+        else:
+            raise ValueError("target_dates 또는 target_date 설정이 필요합니다")
+        
+        if 'time_range' not in job_config and 'time_windows' not in job_config:
+            raise ValueError("time_range 또는 time_windows 설정이 필요합니다")
+        
+        # 시간 구간은 하나(dict) 또는 여러 개(list) 지정 가능, time_windows는 선호 순서대로 나열
+        ranked_windows = job_config.get('time_windows', [])
+        time_range = job_config.get('time_range', ranked_windows)
+        date_time_ranges = job_config.get('date_time_ranges', {})
+        for ranges in [time_range, ranked_windows] + list(date_time_ranges.values()):
+            for r in ([ranges] if isinstance(ranges, dict) else ranges):
+                if 'start' not in r or 'end' not in r:
+                    raise ValueError("time_range에 start와 end 시간을 모두 지정해야 합니다")
+        
+        if 'theme' not in job_config:
+            raise ValueError("theme 설정이 필요합니다")
+        
+        store = job_config.get('store', config.get('store'))
+        if store not in store_configs:
+            raise ValueError(f"지원하지 않는 지점입니다: {store}. 사용 가능한 지점: {list(store_configs.keys())}")
+        
+        # 이름이 겹치면 순번을 붙여 구분
+        name = job_config.get('name') or f"{store}:{job_config['theme']}"
+        if name in names:
+            name = f"{name}#{index}"
+        names.add(name)
+        
+        jobs.append(WatchJob(
+            name=name,
+            store=store,
+            theme=job_config['theme'],
+            target_dates=target_dates,
+            time_range=time_range,
+            # 우선순위 값이 작을수록 먼저 예약 (기본값은 설정 순서)
+            priority=job_config.get('priority', index),
+            user_info=job_config.get('user_info'),
+            date_time_ranges=date_time_ranges,
+            ranked_windows=ranked_windows
+        ))
+    
+    return sorted(jobs, key=lambda job: job.priority)
+
+
+class SlotCandidate:
+    """예약 후보 슬롯 (점수가 낮을수록 우선)"""
+    def __init__(self, score, job, reservation, target_date, theme_id, minutes, detected_at=None):
+        self.score = score
+        self.job = job
+        self.reservation = reservation
+        self.target_date = target_date
+        self.theme_id = theme_id
+        self.minutes = minutes
+        self.detected_at = detected_at  # 슬롯이 열린 것을 발견한 조회 시각
+    
+    @property
+    def date_str(self):
+        return self.target_date.strftime('%Y-%m-%d')
+    
+    @property
+    def time_str(self):
+        return format_minutes(self.minutes)
+
+
+class SlotScorer:
+    """날짜 우선순위, 시간 선호, 테마(작업) 우선순위로 슬롯 점수 계산 (슬롯당 상수 시간)"""
+    def __init__(self, weights=None):
+        self.weights = dict(DEFAULT_SCORING)
+        self.weights.update(weights or {})
+    
+    def score(self, job, date_str, minutes):
+        """슬롯 점수 (낮을수록 우선, 시간 구간 밖이면 None)"""
+        rank = job.slot_rank(date_str, minutes)
+        if rank is None:
+            return None
+        weights = self.weights
+        return (weights['theme'] * job.priority
+                + weights['window'] * rank
+                + weights['date'] * job.date_ranks[date_str]
+                + weights['time'] * minutes / (24 * 60))
+
+
+class BookingExecutor:
+    """상위 후보 슬롯을 동시에 예약 시도 (진행 중 + 성공한 예약 수가 max_bookings를 넘지 않도록 제한)"""
+    def __init__(self, parallel=DEFAULT_PARALLEL_BOOKINGS, max_bookings=DEFAULT_MAX_BOOKINGS):
+        self.parallel = max(1, int(parallel))
+        self.max_bookings = max(1, int(max_bookings))
+        self.executor = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix='booking')
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.held = 0
+        # 허가를 기다리는 후보 순번 (점수가 좋은 후보부터 허가)
+        self.waiting = set()
+    
+    def acquire(self, order, done):
+        """전송 허가 획득 (다른 시도가 성공했거나 보유 한도에 도달하면 False - 시도 포기)"""
+        with self.condition:
+            self.waiting.add(order)
+            try:
+                while not done.is_set() and self.held < self.max_bookings \
+                        and (self.in_flight + self.held >= self.max_bookings or order != min(self.waiting)):
+                    self.condition.wait()
+                if done.is_set() or self.held >= self.max_bookings:
+                    return False
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting.discard(order)
+                self.condition.notify_all()
+    
+    def release(self, booked):
+        """전송 종료 (성공하면 보유 예약 수 증가)"""
+        with self.condition:
+            self.in_flight -= 1
+            if booked:
+                self.held += 1
+            self.condition.notify_all()
+    
+    def attempt(self, order, candidate, user_info, done):
+        """후보 하나 예약 시도 (포기한 경우 None)"""
+        if not self.acquire(order, done):
+            return None
+        
+        booked = False
+        try:
+            result = candidate.reservation.make_reservation(
+                candidate.target_date, candidate.time_str, candidate.theme_id, user_info, candidate.detected_at
+            )
+            booked = result["success"]
+            if booked:
+                done.set()
+            return result
+        finally:
+            self.release(booked)
+    
+    def book(self, candidates, user_info_for):
+        """후보를 점수 순서대로 동시 시도하고 [(candidate, result)] 반환 (포기한 후보의 result는 None)
+        
+        이미 전송된 요청은 취소할 수 없으므로 모든 시도가 끝날 때까지 기다림
+        """
+        done = threading.Event()
+        futures = [
+            (candidate, self.executor.submit(self.attempt, order, candidate, user_info_for(candidate), done))
+            for order, candidate in enumerate(candidates)
+        ]
+        return [(candidate, future.result()) for candidate, future in futures]
+    
+    def reset(self):
+        """완료 처리한 예약을 보유 예약 수에서 제외 (새 작업이 다시 예약할 수 있도록)"""
+        with self.condition:
+            self.held = 0
+            self.condition.notify_all()
+    
+    def shutdown(self):
+        """스레드 풀 종료"""
+        self.executor.shutdown(wait=False)
+
+
+class ReservationWatcher:
+    """여러 지점/테마 감시 작업을 하나의 스케줄러로 실행 (base_url별 세션 1개 공유)"""
+    def __init__(self, jobs, user_info, max_concurrency=DEFAULT_MAX_CONCURRENCY, reservation_options=None,
+                 theme_catalog=None, scorer=None, booking_executor=None, metrics=None, history=None,
+                 reservation_class=None):
+        self.jobs = jobs
+        self.user_info = user_info
+        # 모든 지점이 하나의 지표 집계를 공유
+        self.metrics = metrics or MetricsRegistry()
+        # 예약 현황 변경 기록 (None이면 기록하지 않음)
+        self.history = history
+        self.scorer = scorer or SlotScorer()
+        self.booking_executor = booking_executor or BookingExecutor()
+        # 모든 지점이 하나의 테마 캐시 파일을 공유
+        self.theme_catalog = theme_catalog or ThemeCatalog()
+        
+        self.reservation_options = reservation_options or {}
+        # 지점별 예약 객체 클래스 (프로세스 간 세션 공유 등 확장용)
+        self.reservation_class = reservation_class or ZeroWorldReservation
+        self.max_concurrency = max_concurrency
+        # 일시 정지한 작업 이름
+        self.paused = set()
+        
+        # 같은 base_url의 작업은 하나의 ZeroWorldReservation(세션, 브라우저)을 공유
+        self.reservations = {}
+        self.add_reservations()
+        
+        self.targets = self.build_targets()
+        self.last_snapshots = {}
+        # 예약 확인에서 실패로 판정된 슬롯이 있으면 대기 없이 바로 다시 조회
+        self.retry_now = False
+        self.tracker = SlotTracker()
+        self.poller = AvailabilityPoller(max_workers=min(max_concurrency, len(self.targets)))
+    
+    def add_reservations(self):
+        """작업에 필요한 지점 중 아직 없는 지점의 예약 객체 생성 (세션 갱신 시작)"""
+        for job in self.jobs:
+            base_url = STORE_CONFIGS[job.store]['base_url']
+            if base_url not in self.reservations:
+                self.reservations[base_url] = self.reservation_class(
+                    store=job.store, theme_catalog=self.theme_catalog, metrics=self.metrics,
+                    **self.reservation_options
+                )
+                self.reservations[base_url].session_manager.start()
+    
+    def update_jobs(self, jobs):
+        """감시 작업 교체 (남아 있는 지점의 세션, 토큰, 브라우저, 테마 매핑은 그대로 유지)"""
+        self.jobs = jobs
+        self.add_reservations()
+        
+        # 더 이상 감시하지 않는 지점은 정리
+        used = {STORE_CONFIGS[job.store]['base_url'] for job in jobs}
+        for base_url in list(self.reservations):
+            if base_url not in used:
+                self.reservations.pop(base_url).cleanup()
+        
+        self.paused &= {job.name for job in jobs}
+        self.refresh_targets()
+    
+    def pause(self, name):
+        """작업 일시 정지 (조회와 예약 대상에서 제외, 없는 작업이면 False)"""
+        if name not in {job.name for job in self.jobs}:
+            return False
+        self.paused.add(name)
+        self.refresh_targets()
+        return True
     
-    if 'time_range' not in config:
-        raise ValueError("time_range 설정이 필요합니다")
+    def resume(self, name):
+        """일시 정지한 작업 재개"""
+        if name not in self.paused:
+            return False
+        self.paused.discard(name)
+        self.refresh_targets()
+        return True
     
-    time_range = config['time_range']
-    if 'start' not in time_range or 'end' not in time_range:
-        raise ValueError("time_range에 start와 end 시간을 모두 지정해야 합니다")
+    def active_jobs(self):
+        return [job for job in self.jobs if job.name not in self.paused]
     
-    if 'theme' not in config:
-        raise ValueError("theme 설정이 필요합니다")
+    def refresh_targets(self):
+        """작업 변경 후 조회 대상과 슬롯 추적 상태 다시 계산"""
+        self.targets = self.build_targets()
+        self.tracker.retain({(reservation.base_url, target_date.strftime('%Y-%m-%d'))
+                             for reservation, target_date in self.targets})
+        
+        max_workers = max(1, min(self.max_concurrency, len(self.targets)))
+        if max_workers != self.poller.max_workers:
+            self.poller.shutdown()
+            self.poller = AvailabilityPoller(max_workers=max_workers)
+    
+    def reservation_for(self, job):
+        return self.reservations[STORE_CONFIGS[job.store]['base_url']]
+    
+    def build_targets(self):
+        """조회 대상 (reservation, date) 목록 - 같은 지점의 같은 날짜는 한 번만 조회"""
+        targets = []
+        seen = set()
+        for job in self.active_jobs():
+            reservation = self.reservation_for(job)
+            for target_date in job.target_dates:
+                key = (reservation.base_url, target_date.strftime('%Y-%m-%d'))
+                if key not in seen:
+                    seen.add(key)
+                    targets.append((reservation, target_date))
+        return targets
+    
+    def target_keys(self):
+        return [(reservation.base_url, target_date.strftime('%Y-%m-%d')) for reservation, target_date in self.targets]
+    
+    def target_themes(self):
+        """조회 대상 (base_url, date_str)별로 감시 중인 테마 ID 목록 (테마 매핑이 없으면 빈 목록 = 전체 테마)"""
+        themes = {key: [] for key in self.target_keys()}
+        for job in self.active_jobs():
+            reservation = self.reservation_for(job)
+            for target_date in job.target_dates:
+                try:
+                    theme_id = str(reservation.get_theme_id_by_name(job.theme, target_date))
+                except ValueError:
+                    continue
+                theme_ids = themes[(reservation.base_url, target_date.strftime('%Y-%m-%d'))]
+                if theme_id not in theme_ids:
+                    theme_ids.append(theme_id)
+        return themes
+    
+    def poll(self, keys=None):
+        """지점/날짜(keys가 있으면 해당 (base_url, date_str)만)를 동시에 조회해 {(base_url, date_str): snapshot} 반환"""
+        targets = self.targets
+        if keys is not None:
+            targets = [(reservation, target_date) for reservation, target_date in targets
+                       if (reservation.base_url, target_date.strftime('%Y-%m-%d')) in keys]
+        
+        with self.metrics.timed('poll_cycle') as call:
+            snapshots = self.poller.poll_many(targets, self.user_info)
+            call['error'] = any(snapshot is None for snapshot in snapshots)
+        self.last_snapshots = {
+            (reservation.base_url, target_date.strftime('%Y-%m-%d')): snapshot
+            for (reservation, target_date), snapshot in zip(targets, snapshots)
+        }
+        if self.history is not None:
+            self.history.record_all(self.last_snapshots)
+        return self.last_snapshots
+    
+    def run_cycle(self, keys=None):
+        """한 주기 실행: 전체(또는 keys) 조회 후 새로 열린 슬롯 중 점수가 가장 좋은 후보부터 예약 시도"""
+        snapshots = self.poll(keys)
+        
+        # 이전 조회와 달라진 슬롯만 이벤트로 받음 (변경 없는 날짜는 건너뜀)
+        return self.handle_events(self.tracker.update_all(snapshots))
+    
+    def handle_events(self, events):
+        """슬롯 이벤트 처리: 새로 열린 슬롯 중 점수가 가장 좋은 후보부터 예약 시도 (예약 결과 또는 None)"""
+        self.retry_now = False
+        opened = {}
+        for event in events:
+            if event.kind == 'opened':
+                opened.setdefault((event.store, event.date_str, event.theme_id), []).append(event)
+            else:
+                print(f"🔒 슬롯 마감: {event.date_str} {event.time_str} (테마ID:{event.theme_id})")
+        if not opened:
+            return None
+        
+        candidates = self.collect_candidates(opened)
+        if not candidates:
+            return None
+        
+        for candidate in candidates:
+            print(f"🔔 슬롯 열림: {candidate.date_str} {candidate.time_str} "
+                  f"({candidate.job.describe()}, 점수 {candidate.score:.2f})")
+        
+        # 상위 후보부터 동시에 시도 - 하나가 성공하면 아직 전송하지 않은 나머지는 포기
+        booked = None
+        results = self.booking_executor.book(candidates, lambda c: c.job.user_info or self.user_info)
+        for candidate, result in results:
+            job = candidate.job
+            date_str = candidate.date_str
+            if result and result.get("submitted_at") and candidate.detected_at:
+                self.metrics.observe('slot_open_to_submit', result["submitted_at"] - candidate.detected_at)
+            if result is None:
+                # 포기한 슬롯도 아직 열려 있으면 다음 주기에 다시 보고
+                self.forget_slot(candidate.reservation.base_url, date_str, candidate.theme_id, candidate.time_str)
+                continue
+            
+            if result["success"]:
+                if result.get("uncertain"):
+                    print(f"⚠️  예약 결과 확인 필요: {date_str} {candidate.time_str} ({job.describe()}) - {result['message']}")
+                if booked is None:
+                    print(f"✅ 예약 성공: {date_str} {candidate.time_str} ({job.describe()}) - {result['message']}")
+                    booked = {"job": job, "date": candidate.target_date, "time": candidate.time_str, **result}
+                else:
+                    print(f"⚠️  추가 예약 확보: {date_str} {candidate.time_str} ({job.describe()}) - 필요 없으면 취소하세요")
+                continue
+            
+            # 예약에 실패한 슬롯은 아직 열려 있으면 다음 주기에 다시 시도
+            self.forget_slot(candidate.reservation.base_url, date_str, candidate.theme_id, candidate.time_str)
+            failure = result.get("failure", "unknown")
+            print(f"❌ 예약 실패 ({failure}): {date_str} {candidate.time_str} - {result['message']}")
+            self.metrics.increment(f"booking_failure_{failure}")
+            # 슬롯이 아직 열려 있을 수 있는 실패는 대기 없이 바로 다시 조회
+            if result.get("false_positive") or failure in RETRYABLE_FAILURES:
+                self.retry_now = True
+        
+        return booked
+    
+    def forget_slot(self, store, date_str, theme_id, time_str):
+        """예약하지 못한 슬롯이 다음 조회에서도 열려 있으면 다시 'opened'로 보고되도록 추적 상태에서 제거"""
+        self.tracker.forget(store, date_str, theme_id, time_str)
+    
+    def collect_candidates(self, opened):
+        """새로 열린 슬롯을 모든 작업/날짜에 대해 점수화해 좋은 순서로 정렬"""
+        candidates = []
+        # 테마 ID를 확인하지 못한 (base_url, date_str)와 후보로 확인한 슬롯 키
+        unresolved = set()
+        resolved = set()
+        for job in self.active_jobs():
+            reservation = self.reservation_for(job)
+            for target_date in job.target_dates:
+                date_str = target_date.strftime('%Y-%m-%d')
+                try:
+                    theme_id = reservation.get_theme_id_by_name(job.theme, target_date)
+                except ValueError:
+                    unresolved.add((reservation.base_url, date_str))
+                    continue
+                
+                resolved.add((reservation.base_url, date_str, str(theme_id)))
+                for event in opened.get((reservation.base_url, date_str, str(theme_id)), ()):
+                    score = self.scorer.score(job, date_str, event.minutes)
+                    if score is not None:
+                        candidates.append(SlotCandidate(score, job, reservation, target_date, theme_id, event.minutes,
+                                                        event.detected_at))
+        
+        # 테마 정보가 없어 확인하지 못한 슬롯은 다음 조회에서 다시 보고되도록 추적 상태에서 제거
+        for (store, date_str, theme_id), events in opened.items():
+            if (store, date_str) in unresolved and (store, date_str, theme_id) not in resolved:
+                for event in events:
+                    self.forget_slot(store, date_str, theme_id, event.time_str)
+        
+        candidates.sort(key=lambda candidate: candidate.score)
+        return candidates
+    
+    def themes_loaded(self):
+        return all(self.reservation_for(job).has_theme_info() for job in self.active_jobs())
+    
+    def prepare_standby(self):
+        """지점별로 우선순위가 가장 높은 작업의 첫 날짜로 대기 예약 화면 준비"""
+        for reservation, job in self.standby_jobs():
+            reservation.prepare_standby(job.target_dates[0], job.user_info or self.user_info)
+    
+    def ensure_standby(self):
+        for reservation, job in self.standby_jobs():
+            reservation.ensure_standby(job.target_dates[0], job.user_info or self.user_info)
+    
+    def warm_drivers(self):
+        """지점별 예비 드라이버를 백그라운드에서 미리 실행"""
+        for reservation in self.reservations.values():
+            reservation.get_driver_pool().warm()
+    
+    def standby_jobs(self):
+        first_jobs = {}
+        for job in self.active_jobs():
+            first_jobs.setdefault(STORE_CONFIGS[job.store]['base_url'], job)
+        return [(self.reservations[base_url], job) for base_url, job in first_jobs.items()]
+    
+    def cleanup(self):
+        """리소스 정리"""
+        self.poller.shutdown()
+        self.booking_executor.shutdown()
+        self.metrics.export()
+        if self.history is not None:
+            self.history.close()
+        self.theme_catalog.close()
+        for reservation in self.reservations.values():
+            reservation.cleanup()
+
+
+def create_watcher(config, jobs, theme_catalog=None, reservation_class=None, watcher_class=None, **reservation_options):
+    """설정으로 감시기 생성 (테마 캐시, 지표, 예약 현황 기록, 예약 옵션, 슬롯 점수, 동시 예약 설정 포함)
+    
+    theme_catalog, reservation_class, watcher_class와 추가 예약 옵션은 샤딩 실행기처럼 구성 요소를 바꿀 때 사용
+    """
+    max_concurrency = config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+    parallel_bookings = config.get('parallel_bookings', DEFAULT_PARALLEL_BOOKINGS)
+    
+    # 테마 매핑 디스크 캐시 (재시작 시 바로 조회 시작)
+    if theme_catalog is None:
+        theme_cache = dict(DEFAULT_THEME_CACHE)
+        theme_cache.update(config.get('theme_cache', {}))
+        theme_catalog = ThemeCatalog(**theme_cache)
+    
+    # 호출별 지연 시간/오류 지표 (path를 지정하면 주기적으로 파일에 기록)
+    metrics_config = dict(DEFAULT_METRICS)
+    metrics_config.update(config.get('metrics', {}))
+    metrics = MetricsRegistry(**metrics_config)
+    
+    # 예약 현황 변경 기록 (path를 지정한 경우에만)
+    history_config = dict(DEFAULT_HISTORY)
+    history_config.update(config.get('history', {}))
+    history = SnapshotHistory(**history_config) if history_config['path'] else None
+    
+    # 예약 시스템 초기화 (지점별 하나)
+    return (watcher_class or ReservationWatcher)(
+        jobs,
+        config['user_info'],
+        max_concurrency=max_concurrency,
+        reservation_options={
+            'booking_mode': config.get('booking_mode', 'http'),
+            'step_timeouts': config.get('step_timeouts'),
+            'bootstrap_mode': config.get('bootstrap_mode', 'http'),
+            'headless': config.get('headless', False),
+            'max_qps': config.get('max_qps', DEFAULT_MAX_QPS),
+            'booking_verify': config.get('booking_verify'),
+            'booking_retry': config.get('booking_retry'),
+            'driver_pool': config.get('driver_pool'),
+            # 연결 풀은 동시 조회 + 동시 예약 수보다 작지 않게 유지
+            'transport': dict({'pool_maxsize': max(DEFAULT_TRANSPORT['pool_maxsize'],
+                                                   max_concurrency + parallel_bookings)},
+                              **config.get('transport', {})),
+            **reservation_options
+        },
+        theme_catalog=theme_catalog,
+        scorer=SlotScorer(config.get('scoring')),
+        booking_executor=BookingExecutor(parallel_bookings, config.get('max_bookings', DEFAULT_MAX_BOOKINGS)),
+        metrics=metrics,
+        history=history,
+        reservation_class=reservation_class
+    )
+
+
+def prediction_max_gap(schedule, max_factor):
+    """날짜별 조회 간격이 가장 길어질 때의 조회 공백 (max_interval × max_factor × (1 + jitter) + 여유)"""
+    options = dict(DEFAULT_SCHEDULE)
+    options.update(schedule or {})
+    return options['max_interval'] * max_factor * (1 + options['jitter']) + PREDICTION_GAP_MARGIN
+
+
+def create_predictor(config):
+    """설정으로 취소 패턴 예측기 생성 (사용하지 않으면 None, 예약 현황 기록 파일이 있으면 먼저 학습)"""
+    prediction = dict(DEFAULT_PREDICTION)
+    prediction.update(config.get('prediction', {}))
+    if not prediction.pop('enabled'):
+        return None
+    if prediction['max_gap'] is None:
+        prediction['max_gap'] = prediction_max_gap(config.get('schedule'), prediction['max_factor'])
+    
+    predictor = CancellationPredictor(**prediction)
+    history_path = config.get('history', {}).get('path')
+    if history_path and os.path.exists(history_path):
+        try:
+            count = predictor.load(history_path)
+            logging.getLogger(__name__).info(f"예약 현황 기록 학습: {count}개 ({history_path})")
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"예약 현황 기록을 읽을 수 없습니다: {e}")
+    return predictor
+
+
+def main():
+    """메인 실행 함수"""
+    config = RESERVATION_CONFIG
+    
+    # 로그 출력은 백그라운드 스레드에서 처리 (조회 루프가 콘솔/파일 쓰기를 기다리지 않음)
+    logging_config = dict(DEFAULT_LOGGING)
+    logging_config.update(config.get('logging', {}))
+    setup_logging(**logging_config)
+    
+    # 감시 작업 목록 (jobs 목록 또는 store/theme/target_dates 단일 설정)
+    jobs = load_watch_jobs(config)
     
-    theme_name = config['theme']
-    user_info = config['user_info']
     check_interval = config['check_interval']
+    hot_standby = config.get('hot_standby', False)
     
-    # 예약 시스템 초기화
-    store = config['store']
-    reservation = ZeroWorldReservation(store=store)
+    watcher = create_watcher(config, jobs)
+    metrics = watcher.metrics
+    # 릴리스 시각 전후 고빈도 조회, 오류/한산한 시간 백오프, 취소 가능성이 높은 날짜 우선 조회
+    scheduler = PollScheduler(check_interval, config.get('schedule'), create_predictor(config))
     
     try:
-        # 테마 정보 로드 (첫 번째 날짜로 초기화)
+        # 테마 정보 로드 (전체 날짜 1회 조회로 초기화)
         print(f"테마 정보 로드 중...")
         attempts = 0
         max_attempts = 3
-        while attempts < max_attempts and not reservation.date_theme_mappings:
+        while attempts < max_attempts and not watcher.themes_loaded():
             attempts += 1
             print(f"테마 정보 로드 시도 {attempts}/{max_attempts}...")
-            reservation.get_available_times_for_theme(target_dates[0], None, user_info, theme_name)
-            if reservation.date_theme_mappings:
+            watcher.poll()
+            if watcher.themes_loaded():
                 break
             time.sleep(2)  # 잠깐 대기 후 재시도
         
-        if not reservation.date_theme_mappings:
+        if not watcher.themes_loaded():
             print(f"⚠️  테마 정보 로드 실패. API 응답을 확인해주세요.")
             return
         
-        print(f"대상 테마: '{theme_name}'")
+        for job in jobs:
+            print(f"대상 테마: '{job.theme}' ({STORE_CONFIGS[job.store]['name']})")
         
         # 사용 가능한 테마 목록 표시
-        available_themes = reservation.list_available_themes()
-        if available_themes:
-            print(f"현재 사용 가능한 테마: {available_themes}")
+        for reservation in watcher.reservations.values():
+            available_themes = reservation.list_available_themes()
+            if available_themes:
+                print(f"현재 사용 가능한 테마 ({reservation.store_name}): {available_themes}")
+        
+        # Selenium으로만 예약하면 첫 예약 전에 예비 드라이버를 미리 실행
+        if config.get('booking_mode') == 'selenium':
+            watcher.warm_drivers()
+        
+        # 브라우저를 미리 띄워 1순위 날짜의 예약 화면을 대기 상태로 준비
+        if hot_standby:
+            print("대기 예약 화면 준비 중...")
+            watcher.prepare_standby()
         
         # 예약이 성공할 때까지 주기적으로 모든 날짜 확인
-        print(f"📅 {len(target_dates)}개 날짜에 대해 {check_interval}초마다 확인합니다...")
+        print(f"📅 {len(jobs)}개 작업, {len(watcher.targets)}개 날짜에 대해 기본 {check_interval}초마다 확인합니다...")
         
+        retried = False
         while True:
             try:
-                success = False
-                for i, target_date in enumerate(target_dates, 1):
-                    print(f"[{i}/{len(target_dates)}] 📅 예약 확인: {target_date.strftime('%Y-%m-%d')} {time_range['start']}-{time_range['end']} (테마: {theme_name})")
-                    
-                    result = reservation.check_and_book(
-                        target_date=target_date,
-                        time_range=time_range,
-                        theme_name=theme_name,
-                        user_info=user_info
-                    )
-                    
-                    if result["success"]:
-                        booked_time = result.get("time", "알 수 없음")
-                        print(f"✅ 예약 성공: {target_date.strftime('%Y-%m-%d')} {booked_time} - {result['message']}")
-                        success = True
-                        break
-                    else:
-                        failed_time = result.get("time", "")
-                        time_info = f" {failed_time}" if failed_time else ""
-                        print(f"❌ 예약 실패: {target_date.strftime('%Y-%m-%d')}{time_info} - {result['message']}")
+                # 조회할 지점/날짜를 동시에 조회한 뒤 우선순위대로 예약 시도 (바로 재조회는 전체 날짜)
+                keys = None if retried else scheduler.due_targets(watcher.target_keys())
+                result = watcher.run_cycle(keys)
+                metrics.maybe_export()
                 
-                if success:
+                if result:
                     print("예약이 완료되었습니다!")
                     break
                 else:
-                    print(f"모든 날짜에서 예약 불가. {check_interval}초 후 다시 시도...")
-                    time.sleep(check_interval)
+                    # 예약 시도로 소모되었거나 오래된 대기 화면은 대기 시간 동안 다시 준비
+                    if hot_standby:
+                        watcher.ensure_standby()
+                    scheduler.record_cycle(watcher.last_snapshots,
+                                           watcher.target_themes() if scheduler.predictor else None)
+                    # 연속으로 바로 재조회하지는 않음 (같은 슬롯 반복 전송 방지)
+                    if watcher.retry_now and not retried:
+                        retried = True
+                        print("예약이 확인되지 않아 바로 다시 조회합니다...")
+                        continue
+                    retried = False
+                    delay = scheduler.next_delay()
+                    print(f"모든 날짜에서 예약 불가. {delay:.1f}초 후 다시 시도...")
+                    time.sleep(delay)
                     
             except KeyboardInterrupt:
                 print("사용자에 의해 중단되었습니다.")
@@ -604,7 +3139,7 @@ def main():
     except Exception as e:
         print(f"오류 발생: {e}")
     finally:
-        reservation.cleanup()
+        watcher.cleanup()
 
 
 if __name__ == "__main__":
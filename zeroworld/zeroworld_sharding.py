@@ -0,0 +1,438 @@
+"""
+제로월드 예약 샤딩 실행기
+감시 대상 (지점, 날짜)를 여러 작업자 프로세스에 나눠 조회하고, 새로 열린 슬롯은 조정자 하나가 모아 예약 (중복 예약 방지)
+작업자와 조정자는 CSRF 토큰/세션 쿠키와 테마 매핑을 공유 저장소로 함께 사용
+"""
+
+import argparse
+import copy
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import logging
+
+from zeroworld_reservation import (
+    DEFAULT_LOGGING, DEFAULT_MAX_QPS, DEFAULT_THEME_CACHE, RESERVATION_CONFIG, SESSION_MAX_AGE, SESSION_REFRESH_MARGIN,
+    STORE_CONFIGS, PollScheduler, ReservationWatcher, SlotEvent, ThemeCatalog, ZeroWorldReservation, create_predictor,
+    create_watcher, load_watch_jobs, setup_logging
+)
+
+# 작업자 프로세스 시작 방식 (조정자의 스레드 상태를 물려받지 않도록 spawn 사용)
+START_METHOD = 'spawn'
+
+# 종료 요청 후 작업자 프로세스를 기다리는 시간 (초)
+WORKER_STOP_TIMEOUT = 5
+
+# 작업자 프로세스가 예기치 않게 종료되었을 때 다시 시작하는 최대 횟수 (작업자별, 넘으면 실행 중단)
+WORKER_MAX_RESTARTS = 3
+# 이 시간(초) 이상 계속 실행된 작업자는 재시작 횟수를 다시 0부터 셈 (드문 일시 오류로 실행이 중단되지 않도록)
+WORKER_HEALTHY_SECONDS = 600
+
+# 조정자가 공유 저장소의 테마 매핑을 디스크 캐시에 반영하는 주기 (초)
+THEME_SYNC_INTERVAL = 30
+
+
+class SharedStore:
+    """프로세스 간 공유 상태 (multiprocessing.Manager 기반, 작업자 프로세스에 그대로 전달 가능)"""
+    def __init__(self, manager):
+        # {base_url: {'token': CSRF 토큰, 'cookies': [쿠키 dict], 'expires_at': 만료 시각}}
+        self.sessions = manager.dict()
+        # {(store, date_str): {'mapping': {theme_name: theme_id}, 'updated_at': ts}}
+        self.themes = manager.dict()
+        # 토큰 발급은 한 번에 한 프로세스만 (나머지는 발급된 토큰 사용)
+        self.bootstrap_lock = manager.Lock()
+
+
+class SharedThemeCatalog(ThemeCatalog):
+    """테마 매핑 캐시 (로컬에 없으면 공유 저장소에서 가져오고, 새로 조회한 매핑은 공유 저장소에도 기록)"""
+    def __init__(self, shared_store, **options):
+        self.shared_store = shared_store
+        # {(store, date_str): (공유 저장소에 기록한 매핑, 기록 시각)}
+        self.published = {}
+        super().__init__(**options)
+    
+    def get(self, store, date_str):
+        mapping = super().get(store, date_str)
+        if mapping is not None:
+            return mapping
+        
+        entry = self.shared_store.themes.get((store, date_str))
+        if entry is None or time.time() - entry['updated_at'] > self.ttl:
+            return None
+        self.adopt(store, date_str, entry)
+        return entry['mapping']
+    
+    def adopt(self, store, date_str, entry):
+        """공유 항목을 로컬 캐시에 반영 (조회 시각은 공유 항목 기준 - 공유 항목과 함께 만료, 디스크 캐시가 있으면 기록 요청)"""
+        with self.lock:
+            self.entries[(store, date_str)] = {
+                'mapping': dict(entry['mapping']),
+                'reverse': {str(theme_id): name for name, theme_id in entry['mapping'].items()},
+                'updated_at': entry['updated_at']
+            }
+            for name, theme_id in entry['mapping'].items():
+                self.store_reverse[(store, str(theme_id))] = name
+            if len(self.entries) > self.max_entries:
+                self.evict()
+            if self.path:
+                self.dirty = True
+                self.save_event.set()
+    
+    def sync(self):
+        """공유 저장소와 디스크 캐시 맞춤 (작업자가 조회한 매핑은 로컬에 반영해 기록, 디스크에서 읽은 매핑은 공유)"""
+        if not self.path:
+            return
+        now = time.time()
+        shared = dict(self.shared_store.themes)
+        with self.lock:
+            local = {key: (dict(entry['mapping']), entry['updated_at']) for key, entry in self.entries.items()}
+        
+        for key, entry in shared.items():
+            if now - entry['updated_at'] <= self.ttl and entry['updated_at'] > local.get(key, (None, 0))[1]:
+                self.adopt(*key, entry)
+        for key, (mapping, updated_at) in local.items():
+            if now - updated_at <= self.ttl and (key not in shared or shared[key]['updated_at'] < updated_at):
+                self.shared_store.themes[key] = {'mapping': mapping, 'updated_at': updated_at}
+                self.published[key] = (mapping, updated_at)
+    
+    def put(self, store, date_str, mapping):
+        super().put(store, date_str, mapping)
+        # 매핑이 바뀌었거나 마지막 공유 기록이 ttl/2보다 오래된 경우에만 공유 저장소에 기록 (조회마다 기록하지 않음)
+        key = (store, date_str)
+        now = time.time()
+        published = self.published.get(key)
+        if published is None or published[0] != mapping or now - published[1] > self.ttl / 2:
+            self.shared_store.themes[key] = {'mapping': dict(mapping), 'updated_at': now}
+            self.published[key] = (dict(mapping), now)
+
+
+class SharedReservation(ZeroWorldReservation):
+    """다른 프로세스가 발급받은 CSRF 토큰/세션 쿠키를 재사용하는 예약 객체"""
+    def __init__(self, shared_store=None, **options):
+        self.shared_store = shared_store
+        super().__init__(**options)
+    
+    def bootstrap_csrf_token(self):
+        """공유된 토큰이 유효하면 사용하고, 없으면 새로 발급받아 공유"""
+        if self.shared_store is None:
+            return super().bootstrap_csrf_token()
+        
+        with self.shared_store.bootstrap_lock:
+            if self.adopt_shared_session():
+                self.logger.info(f"공유 세션 사용: {self.store_name}")
+                return self.csrf_token
+            token = super().bootstrap_csrf_token()
+            if token:
+                self.publish_session()
+            return token
+    
+    def adopt_shared_session(self):
+        """공유 저장소의 토큰/쿠키를 세션에 적용 (없거나 곧 만료되거나 거부된 토큰과 같으면 False)"""
+        shared = self.shared_store.sessions.get(self.base_url)
+        if not shared or shared['token'] == self.csrf_token:
+            return False
+        if time.time() >= shared['expires_at'] - SESSION_REFRESH_MARGIN:
+            return False
+        
+        for cookie in shared['cookies']:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'],
+                                     expires=cookie['expires'])
+        self.csrf_token = shared['token']
+        self.session_manager.acquired_at = time.time()
+        self.session_manager.expires_at = shared['expires_at']
+        self.session_manager.cookies_synced = True
+        return True
+    
+    def publish_session(self):
+        """발급받은 토큰과 세션 쿠키를 공유 저장소에 기록"""
+        cookies = [
+            {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path,
+             'expires': cookie.expires}
+            for cookie in self.session.cookies
+        ]
+        self.shared_store.sessions[self.base_url] = {
+            'token': self.csrf_token,
+            'cookies': cookies,
+            'expires_at': self.session_manager.expires_at or time.time() + SESSION_MAX_AGE,
+        }
+
+
+class CoordinatorWatcher(ReservationWatcher):
+    """조정자: 직접 조회하지 않고 작업자가 보낸 슬롯 이벤트로만 예약 (예약하지 못한 슬롯은 담당 작업자에게 다시 보고 요청)"""
+    # {(base_url, date_str): 담당 작업자 명령 대기열}
+    owners = None
+    
+    def forget_slot(self, store, date_str, theme_id, time_str):
+        self.owners[(store, date_str)].put(('forget', store, date_str, str(theme_id), time_str))
+
+
+def shard_path(path, index):
+    """작업자별 파일 경로 (metrics.prom → metrics.shard0.prom)"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{index}{ext}"
+
+
+def shard_config(config, index):
+    """작업자 설정 (지표, 예약 현황 기록, 로그 파일은 작업자별 파일로 분리)"""
+    config = dict(config)
+    for key in ('metrics', 'history', 'logging'):
+        section = dict(config.get(key, {}))
+        if section.get('path'):
+            section['path'] = shard_path(section['path'], index)
+        config[key] = section
+    return config
+
+
+def plan_shards(jobs, workers):
+    """조회 대상 (지점, 날짜)를 정렬해 연속 구간으로 나눔 (같은 지점 날짜는 가능한 한 같은 작업자)
+    
+    ([작업자별 작업 목록], {(base_url, date_str): 작업자 번호}) 반환 - 작업은 맡은 날짜만 남긴 복사본
+    """
+    keys = set()
+    for job in jobs:
+        base_url = STORE_CONFIGS[job.store]['base_url']
+        keys.update((base_url, target_date.strftime('%Y-%m-%d')) for target_date in job.target_dates)
+    keys = sorted(keys)
+    
+    count = max(1, min(int(workers), len(keys)))
+    owners = {key: position * count // len(keys) for position, key in enumerate(keys)}
+    
+    shards = [[] for _ in range(count)]
+    for job in jobs:
+        base_url = STORE_CONFIGS[job.store]['base_url']
+        for index in range(count):
+            dates = [target_date for target_date in job.target_dates
+                     if owners[(base_url, target_date.strftime('%Y-%m-%d'))] == index]
+            if dates:
+                shard_job = copy.copy(job)
+                shard_job.target_dates = dates
+                shards[index].append(shard_job)
+    return shards, owners
+
+
+def split_store_qps(config, owners):
+    """지점별 요청 속도 제한을 그 지점을 조회하는 작업자 수 + 조정자 하나로 나눈 STORE_CONFIGS
+    
+    ([작업자별 STORE_CONFIGS], 조정자 STORE_CONFIGS) 반환 - 조정자도 예약 직전 재조회와 예약 확인 조회를 보내므로 한 몫을 받음
+    """
+    shard_count = max(owners.values()) + 1 if owners else 0
+    shards_by_url = {}
+    for (base_url, _), index in owners.items():
+        shards_by_url.setdefault(base_url, set()).add(index)
+    
+    # 마지막(None)은 조정자 몫 - 조정자는 모든 감시 지점에 요청을 보낼 수 있음
+    store_configs = []
+    for index in list(range(shard_count)) + [None]:
+        stores = {}
+        for store, store_config in STORE_CONFIGS.items():
+            store_config = dict(store_config)
+            sharing = shards_by_url.get(store_config['base_url'], ())
+            max_qps = store_config.get('max_qps', config.get('max_qps', DEFAULT_MAX_QPS))
+            if sharing and (index is None or index in sharing) and max_qps:
+                store_config['max_qps'] = max_qps / (len(sharing) + 1)
+            stores[store] = store_config
+        store_configs.append(stores)
+    return store_configs[:-1], store_configs[-1]
+
+
+def run_shard(index, jobs, config, store_configs, shared_store, events, commands):
+    """작업자 프로세스: 맡은 지점/날짜만 조회해 새로 열린 슬롯을 조정자에게 전달 (예약은 하지 않음)"""
+    STORE_CONFIGS.update(store_configs)
+    logging_config = dict(DEFAULT_LOGGING)
+    logging_config.update(config.get('logging', {}))
+    setup_logging(**logging_config)
+    
+    theme_cache = dict(DEFAULT_THEME_CACHE)
+    theme_cache.update(config.get('theme_cache', {}))
+    # 디스크 캐시는 조정자가 공유 저장소에서 모아 기록 (작업자는 공유 저장소에만 기록)
+    theme_cache['path'] = None
+    watcher = create_watcher(config, jobs, theme_catalog=SharedThemeCatalog(shared_store, **theme_cache),
+                             reservation_class=SharedReservation, shared_store=shared_store)
+    scheduler = PollScheduler(config['check_interval'], config.get('schedule'), create_predictor(config))
+    logger = logging.getLogger(__name__)
+    logger.info(f"작업자 {index} 시작: {len(watcher.targets)}개 날짜")
+    
+    try:
+        while True:
+            try:
+                keys = scheduler.due_targets(watcher.target_keys())
+                snapshots = watcher.poll(keys)
+                
+                opened = []
+                for event in watcher.tracker.update_all(snapshots):
+                    if event.kind == 'opened':
+                        opened.append((event.store, event.date_str, event.theme_id, event.minutes, event.detected_at))
+                    else:
+                        print(f"🔒 슬롯 마감: {event.date_str} {event.time_str} (테마ID:{event.theme_id})")
+                if opened:
+                    events.put(opened)
+                
+                scheduler.record_cycle(snapshots, watcher.target_themes() if scheduler.predictor else None)
+                watcher.metrics.maybe_export()
+                delay = scheduler.next_delay()
+            except Exception as e:
+                # 한 주기의 오류로 맡은 날짜 감시를 멈추지 않음
+                logger.error(f"작업자 {index} 감시 주기 오류: {e}")
+                delay = config['check_interval']
+            
+            # 다음 조회까지 조정자 명령 처리
+            deadline = time.monotonic() + delay
+            while True:
+                try:
+                    command = commands.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if command[0] == 'stop':
+                    return
+                if command[0] == 'forget':
+                    watcher.tracker.forget(*command[1:])
+                elif command[0] == 'poll':
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.cleanup()
+
+
+class ShardedRunner:
+    """조회는 작업자 프로세스에 나눠 실행하고, 예약은 조정자(현재 프로세스) 하나에서만 처리"""
+    def __init__(self, config, workers=None):
+        self.config = config
+        self.jobs = load_watch_jobs(config)
+        self.context = multiprocessing.get_context(START_METHOD)
+        self.manager = self.context.Manager()
+        self.shared_store = SharedStore(self.manager)
+        self.shards, self.owners = plan_shards(self.jobs, workers or os.cpu_count() or 1)
+        self.events = self.context.Queue()
+        self.commands = [self.context.Queue() for _ in self.shards]
+        self.processes = []
+        self.restarts = [0] * len(self.shards)
+        self.started_at = [None] * len(self.shards)
+        # 조정자(현재 프로세스)의 예약 객체도 나눠 받은 요청 속도로 생성
+        self.store_configs, coordinator_stores = split_store_qps(config, self.owners)
+        STORE_CONFIGS.update(coordinator_stores)
+        self.synced_at = 0
+        self.logger = logging.getLogger(__name__)
+        
+        theme_cache = dict(DEFAULT_THEME_CACHE)
+        theme_cache.update(config.get('theme_cache', {}))
+        # 조정자는 조회하지 않으므로 예약 현황을 기록하지 않음
+        self.coordinator = create_watcher(
+            dict(config, history={}), self.jobs,
+            theme_catalog=SharedThemeCatalog(self.shared_store, **theme_cache),
+            reservation_class=SharedReservation, watcher_class=CoordinatorWatcher, shared_store=self.shared_store
+        )
+        self.coordinator.owners = {key: self.commands[index] for key, index in self.owners.items()}
+    
+    def start(self):
+        """작업자 프로세스 시작"""
+        self.sync_themes()
+        self.processes = [self.start_worker(index) for index in range(len(self.shards))]
+    
+    def start_worker(self, index):
+        process = self.context.Process(
+            target=run_shard, name=f"shard-{index}", daemon=True,
+            args=(index, self.shards[index], shard_config(self.config, index), self.store_configs[index],
+                  self.shared_store, self.events, self.commands[index])
+        )
+        process.start()
+        self.started_at[index] = time.monotonic()
+        return process
+    
+    def check_workers(self):
+        """예기치 않게 종료된 작업자를 다시 시작 (재시작 횟수를 넘으면 RuntimeError - 맡은 날짜가 감시되지 않은 채 두지 않음)"""
+        for index, process in enumerate(self.processes):
+            if process.is_alive():
+                if self.restarts[index] and time.monotonic() - self.started_at[index] >= WORKER_HEALTHY_SECONDS:
+                    self.logger.info(f"작업자 {index} 정상 실행 중, 재시작 횟수 초기화")
+                    self.restarts[index] = 0
+                continue
+            if self.restarts[index] >= WORKER_MAX_RESTARTS:
+                raise RuntimeError(f"작업자 {index}가 {WORKER_MAX_RESTARTS}회 재시작 후에도 종료되었습니다 "
+                                   f"(종료 코드 {process.exitcode})")
+            self.restarts[index] += 1
+            self.logger.error(f"작업자 {index} 종료됨 (종료 코드 {process.exitcode}), 다시 시작 "
+                              f"({self.restarts[index]}/{WORKER_MAX_RESTARTS})")
+            self.processes[index] = self.start_worker(index)
+    
+    def sync_themes(self):
+        """작업자가 공유한 테마 매핑을 조정자의 디스크 캐시에 반영 (시작/종료 시와 실행 중 THEME_SYNC_INTERVAL마다)"""
+        self.coordinator.theme_catalog.sync()
+        self.synced_at = time.monotonic()
+    
+    def run(self):
+        """작업자가 보낸 슬롯 이벤트로 예약 (예약 결과 반환, 작업자가 계속 종료되면 RuntimeError)"""
+        if self.config.get('booking_mode') == 'selenium':
+            self.coordinator.warm_drivers()
+        
+        while True:
+            self.check_workers()
+            if time.monotonic() - self.synced_at >= THEME_SYNC_INTERVAL:
+                self.sync_themes()
+            try:
+                slots = self.events.get(timeout=1)
+            except queue.Empty:
+                self.coordinator.metrics.maybe_export()
+                continue
+            
+            # 여러 작업자가 거의 동시에 보낸 슬롯은 함께 점수화
+            while True:
+                try:
+                    slots.extend(self.events.get_nowait())
+                except queue.Empty:
+                    break
+            
+            result = self.coordinator.handle_events([SlotEvent('opened', *slot) for slot in slots])
+            if result:
+                return result
+            if self.coordinator.retry_now:
+                self.broadcast(('poll',))
+    
+    def broadcast(self, command):
+        for commands in self.commands:
+            commands.put(command)
+    
+    def stop(self):
+        """작업자 종료 후 조정자와 공유 저장소 정리"""
+        self.broadcast(('stop',))
+        for process in self.processes:
+            process.join(WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        # 종료 전 마지막으로 공유 매핑을 디스크 캐시에 반영
+        self.sync_themes()
+        self.coordinator.cleanup()
+        self.manager.shutdown()
+
+
+def main():
+    """샤딩 실행기 실행"""
+    parser = argparse.ArgumentParser(description="제로월드 예약 샤딩 실행기 (작업자 프로세스별 조회, 조정자 하나에서 예약)")
+    parser.add_argument('--workers', type=int, help="작업자 프로세스 수 (기본: 설정의 workers 또는 CPU 코어 수)")
+    args = parser.parse_args()
+    
+    config = RESERVATION_CONFIG
+    logging_config = dict(DEFAULT_LOGGING)
+    logging_config.update(config.get('logging', {}))
+    setup_logging(**logging_config)
+    
+    runner = ShardedRunner(config, args.workers or config.get('workers'))
+    print(f"🧩 작업자 {len(runner.shards)}개로 {len(runner.owners)}개 날짜를 나눠 감시합니다...")
+    try:
+        runner.start()
+        result = runner.run()
+        if result:
+            print("예약이 완료되었습니다!")
+    except KeyboardInterrupt:
+        print("사용자에 의해 중단되었습니다.")
+    except RuntimeError as e:
+        print(f"❌ 감시 중단: {e}")
+        sys.exit(1)
+    finally:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+제로월드 예약 사이트 로컬 대체 서버
+/reservation, /reservation/theme, 예약 폼 전송을 흉내 내고 시나리오(정해진 시각에 열리는 슬롯, 녹화한 응답)를 재생
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import logging
+
+# 테마마다 제공하는 기본 시간 목록
+DEFAULT_SLOT_TIMES = ['10:00', '11:30', '13:00', '14:30', '16:00', '17:30', '19:00', '20:30', '22:00']
+
+# 대체 서버가 발급하는 CSRF 토큰
+STANDIN_TOKEN = 'standin-csrf-token'
+
+# 시나리오 기본값
+DEFAULT_SCENARIO = {
+    'themes': [{'PK': 61, 'title': '[로컬] NOX'}, {'PK': 62, 'title': '[로컬] 층간소음'}],
+    'times': DEFAULT_SLOT_TIMES,
+    'open': {},          # 처음부터 열려 있는 슬롯 {date: {theme_id: [time, ...]}}
+    'events': [],        # 시각에 맞춰 열고 닫는 슬롯 [{'at': 초, 'action': 'open'|'close', 'date', 'theme', 'time'}]
+    'recordings': {},    # 녹화한 /reservation/theme 응답 {date: [{'at': 초, 'response': {...}}]}
+    'latency': 0.0,      # 응답마다 추가할 지연 시간 (초)
+    'booking_path': '/reservation',
+    'page_month': None,  # 예약 페이지 datepicker에 표시할 달 ('YYYY-MM', 없으면 이번 달)
+}
+
+# Selenium 예약 경로가 사용하는 요소만 갖춘 예약 페이지
+RESERVATION_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="csrf-token" content="{token}"><title>예약</title></head>
+<body>
+<form id="reservationForm" method="post" action="{booking_path}">
+<input type="hidden" name="_token" value="{token}">
+<input type="hidden" name="reservationDate" value="">
+<div id="step1">
+  <div class="datepicker">{cells}</div>
+  <div id="themes"></div>
+  <div id="times"></div>
+  <button type="button" id="nextBtn">NEXT</button>
+</div>
+<div id="step2" style="display:none">
+  <input type="text" name="name"><input type="text" name="phone">
+  <select name="people">{people}</select>
+  <label><input type="checkbox" name="policy"> 개인정보 수집 동의</label>
+  <input type="hidden" name="paymentType" value="1">
+  <button type="button" id="reservationBtn">예약하기</button>
+</div>
+</form>
+<script>
+var slots = {{}};
+function renderTimes(themeId) {{
+  var box = document.getElementById('times');
+  box.innerHTML = '';
+  (slots[themeId] || []).forEach(function (slot) {{
+    if (slot.reservation) {{ return; }}
+    box.insertAdjacentHTML('beforeend', '<label><input type="radio" name="reservationTime" value="' +
+      slot.time + '"> ' + slot.time + '</label>');
+  }});
+}}
+function loadThemes(date) {{
+  document.querySelector('[name="reservationDate"]').value = date;
+  var body = new URLSearchParams({{reservationDate: date, name: '', phone: '', paymentType: '1'}});
+  fetch('/reservation/theme', {{method: 'POST', body: body, headers: {{'x-csrf-token': '{token}'}}}})
+    .then(function (r) {{ return r.json(); }})
+    .then(function (data) {{
+      slots = data.times || {{}};
+      var box = document.getElementById('themes');
+      box.innerHTML = '';
+      document.getElementById('times').innerHTML = '';
+      (data.data || []).forEach(function (theme) {{
+        box.insertAdjacentHTML('beforeend', '<label><input type="radio" name="themePK" value="' +
+          theme.PK + '"> ' + theme.title + '</label>');
+      }});
+    }});
+}}
+document.querySelectorAll('.datepicker--cell').forEach(function (cell) {{
+  cell.addEventListener('click', function () {{ loadThemes(cell.dataset.date); }});
+}});
+document.getElementById('themes').addEventListener('change', function (e) {{ renderTimes(e.target.value); }});
+document.getElementById('nextBtn').addEventListener('click', function () {{
+  document.getElementById('step1').style.display = 'none';
+  document.getElementById('step2').style.display = 'block';
+}});
+document.getElementById('reservationBtn').addEventListener('click', function () {{
+  if (!document.querySelector('[name="policy"]').checked) {{ alert('개인정보 수집에 동의해주세요'); return; }}
+  document.getElementById('reservationForm').submit();
+}});
+</script>
+</body></html>
+"""
+
+
+class StandInState:
+    """대체 서버 상태 (열린 슬롯, 시나리오 진행, 예약/요청 기록) - 요청 스레드 간 공유"""
+    def __init__(self, scenario=None):
+        self.scenario = dict(DEFAULT_SCENARIO)
+        self.scenario.update(scenario or {})
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        
+        # {(date, theme_id, time): 열린 시각}
+        self.open_slots = {}
+        for date_str, themes in self.scenario['open'].items():
+            for theme_id, times in themes.items():
+                for time_str in times:
+                    self.open_slots[(date_str, str(theme_id), time_str)] = self.start_time
+        
+        self.pending_events = sorted(self.scenario['events'], key=lambda event: event['at'])
+        # 녹화 응답을 재생하는 날짜에서 이 서버로 예약된 슬롯 (응답 위에 reservation: true로 덮어씀)
+        self.recorded_bookings = set()
+        self.bookings = []       # [{'date', 'theme', 'time', 'received_at', 'opened_at', 'form'}]
+        self.request_counts = {}  # {path: 요청 수}
+    
+    def schedule(self, action, date_str, theme_id, time_str, delay=0.0):
+        """현재 시각 기준 delay초 뒤에 슬롯을 열거나 닫도록 예약"""
+        with self.lock:
+            at = time.time() - self.start_time + delay
+            self.pending_events.append({'at': at, 'action': action, 'date': date_str, 'theme': theme_id,
+                                        'time': time_str})
+            self.pending_events.sort(key=lambda event: event['at'])
+    
+    def advance(self):
+        """시나리오 시각이 지난 이벤트 반영 (lock을 잡은 상태에서 호출)"""
+        elapsed = time.time() - self.start_time
+        while self.pending_events and self.pending_events[0]['at'] <= elapsed:
+            event = self.pending_events.pop(0)
+            key = (event['date'], str(event['theme']), event['time'])
+            if event['action'] == 'open':
+                self.open_slots.setdefault(key, self.start_time + event['at'])
+            else:
+                self.open_slots.pop(key, None)
+    
+    def count(self, path):
+        with self.lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+    
+    def theme_response(self, date_str):
+        """/reservation/theme 응답 (녹화 응답이 있으면 재생, 없으면 열린 슬롯으로 생성)"""
+        with self.lock:
+            self.advance()
+            recording = self.recorded_response(date_str)
+            if recording is not None:
+                return recording
+            
+            times = {}
+            for theme in self.scenario['themes']:
+                theme_id = str(theme['PK'])
+                times[theme_id] = [
+                    {'time': f"{time_str}:00", 'reservation': (date_str, theme_id, time_str) not in self.open_slots}
+                    for time_str in self.scenario['times']
+                ]
+            return {'data': self.scenario['themes'], 'times': times}
+    
+    def recorded_response(self, date_str):
+        """경과 시간 기준 가장 최근의 녹화 응답 (해당 날짜 녹화가 없으면 None)"""
+        recordings = self.scenario['recordings'].get(date_str)
+        if not recordings:
+            return None
+        
+        elapsed = time.time() - self.start_time
+        response = recordings[0]['response']
+        for recording in recordings:
+            if recording['at'] > elapsed:
+                break
+            response = recording['response']
+        
+        response = json.loads(json.dumps(response))
+        for theme_id, slots in (response.get('times') or {}).items():
+            for slot in slots or ():
+                if (date_str, str(theme_id), slot.get('time', '')[:5]) in self.recorded_bookings:
+                    slot['reservation'] = True
+        return response
+    
+    def is_open(self, date_str, theme_id, time_str):
+        """슬롯이 현재 열려 있는지 (lock을 잡은 상태에서 호출)"""
+        # 녹화가 없거나 비어 있는 날짜는 theme_response와 같이 열린 슬롯 기준
+        response = self.recorded_response(date_str)
+        if response is not None:
+            slots = (response.get('times') or {}).get(str(theme_id)) or ()
+            return any(slot.get('time', '')[:5] == time_str and not slot.get('reservation') for slot in slots)
+        return (date_str, theme_id, time_str) in self.open_slots
+    
+    def book(self, form):
+        """예약 폼 처리 (열린 슬롯이면 마감 후 (200, 응답), 아니면 (422, 오류))"""
+        received_at = time.time()
+        if form.get('_token') != STANDIN_TOKEN:
+            return 419, {'message': 'CSRF token mismatch'}
+        
+        missing = [field for field in ('reservationDate', 'themePK', 'reservationTime', 'name', 'phone', 'people')
+                   if not form.get(field)]
+        if missing:
+            return 422, {'errors': {field: ['필수 항목입니다'] for field in missing}}
+        if form.get('policy') != 'on':
+            return 422, {'errors': {'policy': ['개인정보 수집에 동의해주세요']}}
+        
+        date_str = form['reservationDate']
+        theme_id = str(form['themePK'])
+        time_str = form['reservationTime'][:5]
+        with self.lock:
+            self.advance()
+            if not self.is_open(date_str, theme_id, time_str):
+                return 422, {'success': False, 'message': '이미 예약된 시간입니다'}
+            
+            opened_at = self.open_slots.pop((date_str, theme_id, time_str), None)
+            if self.scenario['recordings'].get(date_str):
+                self.recorded_bookings.add((date_str, theme_id, time_str))
+            self.bookings.append({'date': date_str, 'theme': theme_id, 'time': time_str, 'received_at': received_at,
+                                  'opened_at': opened_at, 'form': form})
+        return 200, {'success': True, 'message': '예약이 완료되었습니다'}
+    
+    def reservation_page(self):
+        """Selenium 예약 경로용 예약 페이지 HTML"""
+        month = self.scenario['page_month'] or datetime.now().strftime('%Y-%m')
+        first_day = datetime.strptime(f"{month}-01", '%Y-%m-%d')
+        next_month = (first_day + timedelta(days=32)).replace(day=1)
+        cells = "".join(
+            f'<div class="datepicker--cell" data-date="{day:%Y-%m-%d}">{day.day}</div>'
+            for day in (first_day + timedelta(days=offset) for offset in range((next_month - first_day).days))
+        )
+        people = "".join(f'<option value="{count}">{count}명</option>' for count in range(1, 9))
+        return RESERVATION_PAGE.format(token=STANDIN_TOKEN, booking_path=self.scenario['booking_path'], cells=cells,
+                                       people=people)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """예약 사이트 엔드포인트 처리"""
+    state = None
+    
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.state.count(path)
+        self.delay()
+        if path.rstrip('/') != '/reservation':
+            self.send_json(404, {'message': 'Not Found'})
+            return
+        
+        body = self.state.reservation_page().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Set-Cookie', 'laravel_session=standin; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        path = urlparse(self.path).path
+        self.state.count(path)
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        self.delay()
+        
+        if path == '/reservation/theme':
+            if self.headers.get('x-csrf-token') != STANDIN_TOKEN:
+                self.send_json(419, {'message': 'CSRF token mismatch'})
+                return
+            self.send_json(200, self.state.theme_response(form.get('reservationDate', '')))
+        elif path == self.state.scenario['booking_path']:
+            status, payload = self.state.book(form)
+            self.send_json(status, payload)
+        else:
+            self.send_json(404, {'message': 'Not Found'})
+    
+    def delay(self):
+        latency = self.state.scenario['latency']
+        if latency:
+            time.sleep(latency)
+    
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+class StandInServer:
+    """백그라운드 스레드에서 실행되는 대체 서버"""
+    def __init__(self, scenario=None, host='127.0.0.1', port=0):
+        self.state = StandInState(scenario)
+        handler = type('BoundStandInHandler', (StandInHandler,), {'state': self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+    
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='standin', daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def load_scenario(path):
+    """시나리오 JSON 파일 로드"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record_responses(reservation, target_dates, duration, interval, user_info=None):
+    """실제 사이트의 /reservation/theme 응답을 주기적으로 녹화해 시나리오의 recordings 형식으로 반환"""
+    recordings = {target_date.strftime('%Y-%m-%d'): [] for target_date in target_dates}
+    start = time.time()
+    while time.time() - start < duration:
+        csrf_token = reservation.get_csrf_token()
+        for target_date in target_dates:
+            date_str = target_date.strftime('%Y-%m-%d')
+            data = {
+                'reservationDate': date_str,
+                'name': user_info.get('name', '') if user_info else '',
+                'phone': user_info.get('phone', '') if user_info else '',
+                'paymentType': '1'
+            }
+            reservation.rate_limiter.acquire()
+            response = reservation.session.post(f"{reservation.base_url}/reservation/theme",
+                                                headers=reservation.build_request_headers(csrf_token), data=data,
+                                                timeout=reservation.timeout)
+            if response.status_code == 200:
+                # 직전 녹화와 같은 응답은 저장하지 않음
+                payload = response.json()
+                if not recordings[date_str] or recordings[date_str][-1]['response'] != payload:
+                    recordings[date_str].append({'at': round(time.time() - start, 3), 'response': payload})
+        time.sleep(interval)
+    return recordings
+
+
+def main():
+    """대체 서버 실행 또는 실제 사이트 응답 녹화"""
+    parser = argparse.ArgumentParser(description="제로월드 예약 사이트 로컬 대체 서버")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    serve = subparsers.add_parser('serve', help="시나리오를 재생하는 대체 서버 실행")
+    serve.add_argument('scenario', nargs='?', help="시나리오 JSON 파일")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    
+    record = subparsers.add_parser('record', help="실제 사이트 응답을 시나리오 파일로 녹화")
+    record.add_argument('store', help="STORE_CONFIGS의 지점 이름")
+    record.add_argument('dates', nargs='+', help="녹화할 날짜 (YYYY-MM-DD)")
+    record.add_argument('--duration', type=float, default=300, help="녹화 시간 (초)")
+    record.add_argument('--interval', type=float, default=5, help="조회 간격 (초)")
+    record.add_argument('--output', default='scenario.json')
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.command == 'serve':
+        server = StandInServer(load_scenario(args.scenario) if args.scenario else None, args.host, args.port).start()
+        print(f"대체 서버 실행 중: {server.base_url} (Ctrl+C로 종료)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+        return
+    
+    # 녹화는 실제 사이트 설정(config.py)이 필요하므로 이 경우에만 불러옴
+    from zeroworld_reservation import ZeroWorldReservation, ThemeCatalog
+    reservation = ZeroWorldReservation(store=args.store, theme_catalog=ThemeCatalog())
+    try:
+        target_dates = [datetime.strptime(date_str, '%Y-%m-%d') for date_str in args.dates]
+        recordings = record_responses(reservation, target_dates, args.duration, args.interval)
+    finally:
+        reservation.cleanup()
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'recordings': recordings, 'page_month': args.dates[0][:7]}, f, ensure_ascii=False, indent=2)
+    print(f"녹화 완료: {args.output} ({sum(len(items) for items in recordings.values())}개 응답)")
+
+
+if __name__ == "__main__":
+    main()